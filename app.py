@@ -1,12 +1,27 @@
 # app.py
+import json
+import os
 import pandas as pd
 import streamlit as st
 import plotly.express as px
 from st_aggrid import AgGrid, GridOptionsBuilder
-from google.oauth2.service_account import Credentials
-import gspread
-import re
-from typing import Tuple, List
+
+from config import (
+    SERVICE_ACCOUNT_FILE, ABA_CADASTRO, ENV_FONTE_LOCAL, LIMITE_PONTOS_GRAFICO,
+    INTERVALO_ATUALIZACAO, ARQUIVO_LOG_DIAGNOSTICO,
+)
+from fontes import FonteDados
+from pipeline import TURNOS, CacheEtapas, consultar_evolucao, relatorio_memoria
+from filtros import IndiceFiltros, buscar, paginar, total_paginas
+from graficos import figura_box, figura_contagem, figura_dispersao
+from exportacao import FORMATOS, exportar
+from contato import FilaContatos
+from lote import abrir_fonte, calcular
+from snapshot import revisao_fonte
+from atualizador import AtualizadorDados
+from diagnostico import CronometroSecoes, Instrumentacao, configurar_log, taxa_cache
+from esquemas import registro_padrao
+from regras import ORDEM_CATEGORIAS, aplicar_categorias, carregar_regras
 
 # =====================================================
 # 1. CONFIGURAÇÕES GERAIS
@@ -14,335 +29,143 @@ from typing import Tuple, List
 st.set_page_config(page_title="Dashboard Motoristas - Shopee", layout="wide")
 st.title("📊 Dashboard Drivers")
 
-SERVICE_ACCOUNT_FILE = "credentials.json"  # <-- confirme que esse arquivo existe
-SHEET_ID = "1PwudX5L5c_zuQJXSCzAyZSdxTVRY0MMcqzGqS-up7nw"
-
-# Abas
-ABA_OFERTA = "SHEET_OFERTA"
-ABA_CARREG = "SHEET_CARREG"
-ABA_CADASTRO = "BASE_CADASTRO"            # aba fixa onde escreveremos 'contato'
-ABA_ATUALIZAR = "SHEET_ATUALIZAR_CAD"
-
 # =====================================================
 # 2. UTILIDADES
 # =====================================================
-
-def normalizar_colunas(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = (
-        df.columns
-        .astype(str)
-        .str.strip()
-        .str.lower()
-        .str.replace(" ", "_")
-        .str.replace(r"[^a-z0-9_]", "", regex=True)
-    )
-    return df
-
-def detectar_coluna_telefone(cols: List[str]) -> str:
-    """Procura nomes comuns para telefone e retorna o nome normalizado."""
-    cand = [c.lower().strip() for c in cols]
-    if "phone_number" in cand:
-        return cols[cand.index("phone_number")]
-    for opt in ("phone number", "phone", "telefone", "telefone_celular", "celular"):
-        if opt in cand:
-            return cols[cand.index(opt)]
-    # fallback: procura coluna que contenha 'phone' ou 'tel'
-    for i, c in enumerate(cand):
-        if "phone" in c or "tel" in c:
-            return cols[i]
-    return None
+# mapeamento de colunas (normalização, telefone, driver_id/driver_name) fica em esquemas.py
 
 # =====================================================
 # 3. CONEXÃO COM GOOGLE SHEETS
 # =====================================================
 @st.cache_resource
-def conectar_sheets():
-    # Usamos escopo de spreadsheets completo para leitura/escrita (se necessário)
-    creds = Credentials.from_service_account_file(
-        SERVICE_ACCOUNT_FILE,
-        scopes=["https://www.googleapis.com/auth/spreadsheets"]
-    )
-    cliente = gspread.authorize(creds)
-    return cliente
+def obter_fonte() -> FonteDados:
+    # DRIVERS_FONTE_LOCAL=<pasta> usa arquivos CSV/JSON no lugar da planilha;
+    # a planilha vem com limite de cota e novas tentativas (lote.abrir_fonte)
+    return abrir_fonte(os.environ.get(ENV_FONTE_LOCAL))
 
 # =====================================================
 # 4. CARREGAMENTO E TRATAMENTO DOS DADOS
 # =====================================================
-@st.cache_data(ttl=1800)
-def carregar_dados() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    cliente = conectar_sheets()
-
-    # ---------- SHEET_OFERTA ----------
-    plan_oferta = cliente.open_by_key(SHEET_ID).worksheet(ABA_OFERTA)
-    dados_oferta = pd.DataFrame(plan_oferta.get_all_records())
-    df_oferta = normalizar_colunas(dados_oferta)
-
-    # colunas fixas esperadas (ajustamos para o que existe realmente)
-    colunas_fixas = ["driver_id", "driver_name", "cluster", "vehicle_type", "no_show_time"]
-    colunas_fixas = [c for c in colunas_fixas if c in df_oferta.columns]
-    colunas_datas = [c for c in df_oferta.columns if c not in colunas_fixas]
-
-    # evitar naming collision no melt
-    value_col_name = "status"
-    i = 1
-    while value_col_name in df_oferta.columns:
-        value_col_name = f"status_{i}"
-        i += 1
-
-    df_long = df_oferta.melt(
-        id_vars=colunas_fixas,
-        value_vars=colunas_datas,
-        var_name="data",
-        value_name=value_col_name
-    )
-    # renomear para 'status' internamente
-    df_long = df_long.rename(columns={value_col_name: "status"})
-
-    df_long["data"] = pd.to_datetime(df_long["data"], errors="coerce")
-    df_long = df_long.dropna(subset=["data"])
-
-    # Disponibilidade e turno
-    def verificar_disponibilidade_e_turno(valor):
-        if pd.isna(valor) or str(valor).strip() in ["", "--", "Not Available"]:
-            return 0, "Sem Oferta"
-        texto = str(valor)
-        # aceita se aparece o horário (string exata)
-        am = "05:15-09:00"
-        pm1 = "11:45-14:30"
-        has_am = am in texto
-        has_pm1 = pm1 in texto
-        # um mesmo campo pode conter ambos; vamos tratar em flags separadas:
-        if has_am and has_pm1:
-            # caso o status contenha ambos, retornamos Disponível e marcar como "AM|PM1"
-            return 1, "AM|PM1"
-        if has_am:
-            return 1, "AM"
-        if has_pm1:
-            return 1, "PM1"
-        # else: se contém algum horário diferente mas regex tem, considerar disponivel
-        if re.search(r"\d{2}:\d{2}-\d{2}:\d{2}", texto):
-            return 1, "Outro"
-        return 0, "Sem Oferta"
-
-    # aplica e cria colunas
-    df_long[["disponivel", "turno"]] = df_long["status"].apply(
-        lambda x: pd.Series(verificar_disponibilidade_e_turno(x))
-    )
+@st.cache_resource
+def obter_instrumentacao() -> Instrumentacao:
+    # medições de tempo/linhas da carga e dos reruns (painel de diagnóstico + log JSON)
+    configurar_log(ARQUIVO_LOG_DIAGNOSTICO)
+    return Instrumentacao()
 
-    # Explodir clusters em linhas separadas para filtro por cluster
-    if "cluster" in df_long.columns:
-        df_long["cluster_individual"] = df_long["cluster"].apply(lambda x: [c.strip() for c in str(x).split(",")])
-        df_long = df_long.explode("cluster_individual")
-        # limpar prefixos numéricos "01. NOME"
-        df_long["cluster_individual"] = df_long["cluster_individual"].str.replace(r"^\d+\.\s*", "", regex=True)
-    else:
-        df_long["cluster_individual"] = None
-
-    # ---------- SHEET_CARREG ----------
-    plan_carreg = cliente.open_by_key(SHEET_ID).worksheet(ABA_CARREG)
-    dados_carreg = pd.DataFrame(plan_carreg.get_all_records())
-    df_carreg = normalizar_colunas(dados_carreg)
-
-    # identificar coluna de data / driver
-    # tentativas comuns:
-    delivery_col = None
-    for cand in ["delivery_date", "date", "data_entrega", "task_date", "task_at_date"]:
-        if cand in df_carreg.columns:
-            delivery_col = cand
-            break
-
-    # driver columns detection fallback
-    driver_id_col = None
-    driver_name_col = None
-    for c in df_carreg.columns:
-        lc = c.lower()
-        if "driver_id" in lc:
-            driver_id_col = c
-        if "driver_name" in lc or "driver_nome" in lc or "driver" == lc:
-            driver_name_col = c
-    # Normalize presence
-    if driver_id_col is None and "driver_id" in df_carreg.columns:
-        driver_id_col = "driver_id"
-    if driver_name_col is None and "driver_name" in df_carreg.columns:
-        driver_name_col = "driver_name"
-
-    if delivery_col and driver_id_col and driver_name_col:
-        df_carreg[delivery_col] = pd.to_datetime(df_carreg[delivery_col], errors="coerce")
-        df_carreg = df_carreg.dropna(subset=[delivery_col])
-        df_carreg["dia_carregado"] = df_carreg[delivery_col].dt.date
-        dias_carregados_df = (
-            df_carreg.groupby([driver_id_col, driver_name_col])["dia_carregado"]
-            .nunique()
-            .reset_index()
-            .rename(columns={driver_id_col: "driver_id", driver_name_col: "driver_name", "dia_carregado": "dias_carregado"})
-        )
-    else:
-        # se não encontrou colunas suficientes, criar df vazio com colunas esperadas
-        dias_carregados_df = pd.DataFrame(columns=["driver_id", "driver_name", "dias_carregado"])
-
-    # ---------- SHEET_CADASTRO e SHEET_ATUALIZAR ----------
-    plan_cadastro = cliente.open_by_key(SHEET_ID).worksheet(ABA_CADASTRO)
-    dados_cadastro = plan_cadastro.get_all_records()
-    df_cadastro = pd.DataFrame(dados_cadastro)
-    df_cadastro = normalizar_colunas(df_cadastro)
-
-    # ABA_ATUALIZAR
-    plan_atual = cliente.open_by_key(SHEET_ID).worksheet(ABA_ATUALIZAR)
-    dados_atual = plan_atual.get_all_records()
-    df_atual = pd.DataFrame(dados_atual)
-    df_atual = normalizar_colunas(df_atual)
-
-    # detectar coluna de telefone (preferir na aba de atualização, depois cadastro)
-    tel_col = detectar_coluna_telefone(list(df_atual.columns)) or detectar_coluna_telefone(list(df_cadastro.columns))
-    # padronizar nome interno
-    if tel_col:
-        # renomear localmente para phone_number se diferente
-        if tel_col != "phone_number":
-            if tel_col in df_atual.columns:
-                df_atual = df_atual.rename(columns={tel_col: "phone_number"})
-            if tel_col in df_cadastro.columns:
-                df_cadastro = df_cadastro.rename(columns={tel_col: "phone_number"})
-
-    # preencher colunas driver_id / driver_name nas bases se existirem nomes diferentes
-    for df in (df_cadastro, df_atual):
-        cols = [c for c in df.columns]
-        if "driver_id" not in cols:
-            # tentar achar algo parecido
-            for cand in cols:
-                if "driver" in cand and "id" in cand:
-                    df.rename(columns={cand: "driver_id"}, inplace=True)
-                    break
-        if "driver_name" not in cols:
-            for cand in cols:
-                if "driver" in cand and ("name" in cand or "nome" in cand):
-                    df.rename(columns={cand: "driver_name"}, inplace=True)
-                    break
-
-    # garantir colunas na forma esperada
-    if "driver_id" not in df_cadastro.columns:
-        df_cadastro["driver_id"] = pd.NA
-    if "driver_name" not in df_cadastro.columns:
-        df_cadastro["driver_name"] = pd.NA
-    if "driver_id" not in df_atual.columns:
-        df_atual["driver_id"] = pd.NA
-    if "driver_name" not in df_atual.columns:
-        df_atual["driver_name"] = pd.NA
-
-    # limpar duplicados
-    df_cadastro = df_cadastro.drop_duplicates(subset=["driver_id", "driver_name"])
-    df_atual = df_atual.drop_duplicates(subset=["driver_id", "driver_name"])
-
-    # ---------- RESUMO OFERTA ----------
-    # dias ofertados por dia (um dia é contado se qualquer turno ofertado naquele dia)
-    dias_ofertados = (
-        df_long[df_long["disponivel"] == 1]
-        .groupby(["driver_id", "driver_name", "data"])["disponivel"]
-        .max()
-        .reset_index()
+@st.cache_resource
+def obter_cache_etapas() -> CacheEtapas:
+    # sobrevive à expiração do cache_data: mudou uma aba, só as etapas dela são refeitas
+    return CacheEtapas()
+
+def carregar_dados(fonte: FonteDados, cache_etapas: CacheEtapas, instrumentacao: Instrumentacao):
+    # etapas do tratamento em pipeline.py (também usadas pelo benchmark.py);
+    # snapshot em disco evita novo download enquanto a planilha não mudar;
+    # quando muda, a SHEET_OFERTA é atualizada só pelas colunas de data novas
+    # (o mesmo caminho do lote.py, que pode pré-calcular o snapshot fora do dashboard)
+    resultado = calcular(fonte, cache_etapas=cache_etapas, medir=instrumentacao.medir("carga"))
+    resumo, _, _, _, df_clusters, _, _ = resultado
+    # índice dos filtros da sidebar, montado uma vez por carga
+    return (*resultado, IndiceFiltros(resumo, df_clusters))
+
+@st.cache_resource
+def obter_atualizador() -> AtualizadorDados:
+    # um por processo: recarrega em segundo plano antes de os dados envelhecerem e
+    # entrega a última carga boa a todas as sessões (nenhum rerun espera a recarga);
+    # planilha sem revisão nova: a carga em uso (e o índice dos filtros) é mantida
+    fonte, cache_etapas, instrumentacao = obter_fonte(), obter_cache_etapas(), obter_instrumentacao()
+    return AtualizadorDados(
+        lambda: carregar_dados(fonte, cache_etapas, instrumentacao), INTERVALO_ATUALIZACAO,
+        revisao=lambda: revisao_fonte(fonte),
     )
 
-    resumo = df_long.groupby(["driver_id", "driver_name", "vehicle_type", "no_show_time"], dropna=False).agg(
-        total_dias=("data", "nunique")
-    ).reset_index()
-
-    dias_disponiveis = dias_ofertados.groupby(["driver_id", "driver_name"], dropna=False).agg(
-        dias_disponivel=("data", "nunique")
-    ).reset_index()
-
-    resumo = resumo.merge(dias_disponiveis, on=["driver_id", "driver_name"], how="left")
-    resumo["dias_disponivel"] = resumo["dias_disponivel"].fillna(0).astype(int)
-    resumo["dias_sem_ofertar"] = resumo["total_dias"] - resumo["dias_disponivel"]
-
-    # sequência máxima sem ofertar (compatível com várias versões pandas)
-    def max_consecutivos(grp):
-        grp = grp.sort_values("data")
-        faltou = (grp["disponivel"] == 0).astype(int)
-        max_seq = seq = 0
-        for f in faltou:
-            if f == 1:
-                seq += 1
-                if seq > max_seq:
-                    max_seq = seq
-            else:
-                seq = 0
-        return max_seq
-
-    seq_inatividade = df_long.groupby("driver_name").apply(max_consecutivos).reset_index()
-    seq_inatividade.columns = ["driver_name", "max_dias_sem_ofertar"]
-    resumo = resumo.merge(seq_inatividade, on="driver_name", how="left")
-
-    # adicionar dias_carregado
-    resumo = resumo.merge(dias_carregados_df, on=["driver_id", "driver_name"], how="left")
-    resumo["dias_carregado"] = resumo["dias_carregado"].fillna(0).astype(int)
-
-    # oferta x carregamento %
-    resumo["oferta_x_carregamento_%"] = ((resumo["dias_carregado"] / resumo["dias_disponivel"].replace(0, pd.NA)) * 100).fillna(0).round(1)
-
-    # regra extra: se ofertou <= 1 dia por cada 7 dias no período, marcar Risco de Churn
-    # para comparação usamos total_dias (período disponível no relatório)
-    resumo["rate_por_7dias"] = resumo.apply(lambda r: (r["dias_disponivel"] / r["total_dias"] * 7) if r["total_dias"]>0 else 0, axis=1)
-    # rate_por_7dias é número de dias ofertados por janela de 7 dias; se <=1 então risco
-    # Implementamos classificação combinada abaixo.
-
-    # Classificação
-    def classificar(row):
-        if row["dias_disponivel"] == 0:
-            return "Inativo"
-        # risco se dias_sem_ofertar > 14 OU se rate_por_7dias <= 1
-        if (row.get("dias_sem_ofertar", 0) > 14) or (row.get("rate_por_7dias", 0) <= 1):
-            return "Risco de Churn"
-        if row["dias_disponivel"] > row["total_dias"] * 0.5:
-            return "Engajado"
-        return "Intermediário"
-
-    resumo["categoria"] = resumo.apply(classificar, axis=1)
-
-    # anexar telefone e status cadastro (união com df_cadastro / df_atual)
-    # criar df_cad_total para procurar phone/status
-    df_cad_total = pd.concat([df_cadastro.assign(status_cadastro="Existente"), df_atual.assign(status_cadastro="Atualização")], ignore_index=True, sort=False)
-    # normalizar coluna phone_number se existir
-    if "phone_number" not in df_cad_total.columns:
-        df_cad_total["phone_number"] = pd.NA
-
-    # garantir driver_id na df_cad_total
-    if "driver_id" not in df_cad_total.columns:
-        df_cad_total["driver_id"] = pd.NA
-    if "driver_name" not in df_cad_total.columns:
-        df_cad_total["driver_name"] = pd.NA
-
-    # dedup por driver_id preferencialmente
-    df_cad_total = df_cad_total.drop_duplicates(subset=["driver_id", "driver_name"])
-
-    resumo = resumo.merge(df_cad_total[["driver_id", "phone_number", "status_cadastro"]], on="driver_id", how="left")
-
-    # preencher nulos
-    resumo["phone_number"] = resumo["phone_number"].fillna("N/A")
-    resumo["status_cadastro"] = resumo["status_cadastro"].fillna("N/A")
-
-    # preparar conjuntos para filtros (clusters originais únicos)
-    clusters_unicos = sorted(df_long["cluster_individual"].dropna().unique().tolist())
-
-    return resumo, df_long, df_cadastro, df_atual, clusters_unicos
+@st.cache_data(max_entries=2, show_spinner=False)
+def carregar_novos_contato(_df_cadastro, _df_atual, chave) -> pd.DataFrame:
+    # motoristas da SHEET_ATUALIZAR_CAD que ainda não estão na BASE_CADASTRO, a partir das
+    # abas já padronizadas pela carga (pipeline.preparar_cadastros); `chave` = carga
+    # (os DataFrames não são hasheados). Limpo pela fila de contatos logo após cada escrita.
+    if _df_atual.empty:
+        return pd.DataFrame()
+    novos = _df_atual[~_df_atual["driver_id"].isin(_df_cadastro["driver_id"])]
+    colunas_disp = [c for c in ["driver_id", "driver_name", "phone_number"] if c in novos.columns]
+    return novos[colunas_disp].reset_index(drop=True)
+
+@st.cache_data(max_entries=12, show_spinner=False)
+def exportar_resumo(_resumo_filtrado, chave, formato):
+    # só roda no clique de download; `chave` = carga + estado dos filtros (o DataFrame não é hasheado)
+    with obter_instrumentacao()(f"exportar:{formato}", grupo="exportacao", linhas=len(_resumo_filtrado)):
+        return exportar(_resumo_filtrado, formato)
+
+@st.cache_resource
+def obter_fila_contatos() -> FilaContatos:
+    # uma fila por processo: grava em segundo plano; ao gravar, limpa os novos em cache e
+    # pede uma recarga (a BASE_CADASTRO mudou, e os novos saem das abas da carga)
+    atualizador = obter_atualizador()
+
+    def ao_gravar():
+        carregar_novos_contato.clear()
+        atualizador.solicitar()
+
+    return FilaContatos(obter_fonte(), ABA_CADASTRO, ao_gravar=ao_gravar)
 
 # =====================================================
 # 5. EXECUÇÃO
 # =====================================================
+instrumentacao = obter_instrumentacao()
+cronometro = CronometroSecoes(instrumentacao)
+atualizador = obter_atualizador()
 try:
-    resumo, df_long, df_cadastro, df_atual, clusters_unicos = carregar_dados()
-    st.success("✅ Dados carregados com sucesso (SHEET_OFERTA, SHEET_CARREG, CADASTRO)!")
+    # só a primeira carga do processo espera aqui; depois vem sempre a última carga boa
+    dados, carregado_em = atualizador.obter()
 except FileNotFoundError as e:
     st.error(f"Erro ao localizar {SERVICE_ACCOUNT_FILE}: {e}")
     st.stop()
 except Exception as e:
     st.error(f"Erro ao carregar dados: {e}")
     st.stop()
+resumo, df_long, df_cadastro, df_atual, df_clusters, cubo, clusters_unicos, indice_filtros = dados
+
+# idade = desde a carga da revisão em uso (conferências sem mudança não a renovam)
+idade_min = int(atualizador.idade() // 60)
+verificado_em = atualizador.verificado_em
+conferida = f" Planilha conferida às {verificado_em:%H:%M}." if verificado_em and verificado_em > carregado_em else ""
+st.success(
+    "✅ Dados carregados com sucesso (SHEET_OFERTA, SHEET_CARREG, CADASTRO)! "
+    f"Atualizados às {carregado_em:%H:%M} ({'agora' if idade_min < 1 else f'há {idade_min} min'}).{conferida}"
+)
+if atualizador.atualizando:
+    st.caption("🔄 Atualizando os dados em segundo plano...")
+if atualizador.ultimo_erro:
+    st.warning(
+        f"A última atualização falhou ({atualizador.ultimo_erro}); exibindo os dados de "
+        f"{carregado_em:%d/%m %H:%M}. Nova tentativa em segundo plano."
+    )
 
 # =====================================================
 # 6. FILTROS (aplicados globalmente)
 # =====================================================
+cronometro.secao("filtros")
+if st.sidebar.button("🔄 Atualizar dados agora"):
+    atualizador.solicitar()
+
 st.sidebar.header("🔍 Filtros")
 
+# Regras de categoria: reclassifica o resumo já carregado, sem nova carga
+config_regras = carregar_regras()
+with st.sidebar.expander("⚙️ Regras de Categoria"):
+    parametros = config_regras["parametros"]
+    parametros["dias_risco"] = st.number_input(
+        "Risco: dias sem ofertar acima de", min_value=0, value=int(parametros["dias_risco"]), step=1
+    )
+    parametros["rate_minimo"] = st.number_input(
+        "Risco: dias ofertados a cada 7 até", min_value=0.0, max_value=7.0,
+        value=float(parametros["rate_minimo"]), step=0.5
+    )
+    parametros["fracao_engajado"] = st.slider(
+        "Engajado: fração de dias ofertados acima de", min_value=0.0, max_value=1.0,
+        value=float(parametros["fracao_engajado"]), step=0.05
+    )
+resumo = aplicar_categorias(resumo, config_regras)
+
 # Categoria
 categoria_filtro = st.sidebar.multiselect(
     "Categoria:",
@@ -360,7 +183,7 @@ cluster_selecionado = st.sidebar.selectbox(
 # Turno
 turno_filtro = st.sidebar.multiselect(
     "Turno:",
-    options=["AM", "PM1", "AM|PM1", "Outro", "Sem Oferta"],
+    options=TURNOS,
     default=["AM", "PM1", "AM|PM1"]
 )
 
@@ -376,32 +199,17 @@ st.sidebar.header("🏆 Ranking de Aproveitamento")
 top_n = st.sidebar.slider("Quantos motoristas exibir:", min_value=5, max_value=100, value=10, step=5)
 min_aprov = st.sidebar.slider("Aproveitamento mínimo (%):", min_value=0, max_value=100, value=0, step=5)
 
-# Aplicar filtro global: filtrar df_long por cluster selecionado para obter lista de drivers no cluster
-if cluster_selecionado and cluster_selecionado != "(Todos)":
-    mask_cluster = df_long["cluster_individual"] == cluster_selecionado
-    drivers_no_cluster = df_long.loc[mask_cluster, "driver_id"].unique().tolist()
-else:
-    drivers_no_cluster = resumo["driver_id"].unique().tolist()
-
-# Filtrar 'resumo' por drivers_no_cluster e demais filtros
-resumo_filtrado = resumo[
-    (resumo["driver_id"].isin(drivers_no_cluster))
-    & (resumo["categoria"].isin(categoria_filtro))
-    & (resumo["vehicle_type"].isin(veiculo_filtro))
-    & (resumo["oferta_x_carregamento_%"] >= min_aprov)
+# Aplicar filtros pelo índice montado na carga (interseção de posições, sem varrer colunas)
+cluster_filtro = cluster_selecionado if cluster_selecionado and cluster_selecionado != "(Todos)" else None
+indice_filtros = indice_filtros.com_categorias(resumo["categoria"])
+resumo_filtrado = resumo.iloc[
+    indice_filtros.filtrar_resumo(categoria_filtro, veiculo_filtro, cluster_filtro, min_aprov)
 ].copy()
 
-# Filtrar df_long também para exibições detalhadas
-if cluster_selecionado and cluster_selecionado != "(Todos)":
-    df_long_filtrado = df_long[df_long["cluster_individual"] == cluster_selecionado].copy()
-else:
-    df_long_filtrado = df_long.copy()
-
-df_long_filtrado = df_long_filtrado[df_long_filtrado["turno"].isin(turno_filtro)]
-
 # =====================================================
 # 7. KPIs
 # =====================================================
+cronometro.secao("kpis", linhas=len(resumo_filtrado))
 col1, col2, col3, col4, col5 = st.columns([1,1,1,1,1.2])
 col1.metric("Total Motoristas", resumo_filtrado["driver_name"].nunique())
 col2.metric("Engajados", (resumo_filtrado["categoria"] == "Engajado").sum())
@@ -413,48 +221,41 @@ col5.metric("Aproveitamento médio (%)", f"{media_aproveitamento_val}%")
 # =====================================================
 # 8. GRÁFICOS PRINCIPAIS
 # =====================================================
+cronometro.secao("graficos", linhas=len(resumo_filtrado))
 col1, col2 = st.columns(2)
-ordem = ["Engajado", "Intermediário", "Risco de Churn", "Inativo"]
+ordem = ORDEM_CATEGORIAS
 
+# as figuras levam contagens/quartis calculados aqui, não uma linha por motorista (graficos.py)
 with col1:
-    fig1 = px.histogram(
-        resumo_filtrado,
-        x="categoria",
-        color="categoria",
-        category_orders={"categoria": ordem},
-        title="Distribuição por Categoria"
-    )
+    fig1 = figura_contagem(resumo_filtrado, "categoria", ordem, "Distribuição por Categoria")
     st.plotly_chart(fig1, use_container_width=True)
 
 with col2:
-    fig2 = px.box(
-        resumo_filtrado,
-        x="categoria",
-        y="dias_sem_ofertar",
-        color="categoria",
-        category_orders={"categoria": ordem},
-        title="Dias sem ofertar por Categoria"
-    )
+    fig2 = figura_box(resumo_filtrado, "categoria", "dias_sem_ofertar", ordem, "Dias sem ofertar por Categoria")
     st.plotly_chart(fig2, use_container_width=True)
 
 # =====================================================
 # 9. CORRELAÇÃO OFERTA x CARREGAMENTO
 # =====================================================
+cronometro.secao("correlacao", linhas=len(resumo_filtrado))
 st.subheader("🔄 Correlação: Dias com Oferta vs Dias com Carregamento")
-fig_corr = px.scatter(
+fig_corr = figura_dispersao(
     resumo_filtrado,
     x="dias_disponivel",
     y="dias_carregado",
-    color="categoria",
-    size="oferta_x_carregamento_%",
-    hover_data=["driver_name", "phone_number", "dias_disponivel", "dias_carregado", "oferta_x_carregamento_%"],
-    title="Correlação entre dias ofertados e dias carregados"
+    cor="categoria",
+    tamanho="oferta_x_carregamento_%",
+    hover=["driver_name", "phone_number", "dias_disponivel", "dias_carregado", "oferta_x_carregamento_%"],
+    ordem=ordem,
+    titulo="Correlação entre dias ofertados e dias carregados",
+    limite=LIMITE_PONTOS_GRAFICO,
 )
 st.plotly_chart(fig_corr, use_container_width=True)
 
 # =====================================================
 # 10. RANKING
 # =====================================================
+cronometro.secao("ranking")
 st.subheader("🏆 Ranking de Motoristas (Oferta × Carregamento)")
 ranking = resumo_filtrado.sort_values("oferta_x_carregamento_%", ascending=False).head(top_n)
 ranking = ranking.assign(
@@ -477,28 +278,60 @@ st.plotly_chart(fig_rank, use_container_width=True)
 # =====================================================
 # 11. EVOLUÇÃO TEMPORAL
 # =====================================================
+cronometro.secao("evolucao")
 st.subheader("📈 Evolução da Disponibilidade")
-df_evolucao = df_long_filtrado.groupby("data")["disponivel"].mean().reset_index()
+# respondida pelo cubo data × cluster × turno montado na carga (não reagrupa df_long)
+df_evolucao = consultar_evolucao(cubo, turno_filtro, cluster_filtro)
 fig3 = px.line(df_evolucao, x="data", y="disponivel", title="Disponibilidade Média Diária")
 st.plotly_chart(fig3, use_container_width=True)
 
 # =====================================================
 # 12. TABELA DETALHADA + DOWNLOAD
 # =====================================================
+cronometro.secao("tabela")
 st.subheader("📋 Tabela Detalhada")
-gb = GridOptionsBuilder.from_dataframe(resumo_filtrado)
-gb.configure_pagination(paginationAutoPageSize=True)
+# busca, ordenação e paginação no servidor: só a página visível vai para o navegador
+col_busca, col_ordem, col_sentido, col_tamanho = st.columns([2, 1.5, 1, 1])
+busca = col_busca.text_input("Buscar (ID, nome ou telefone):", "")
+ordenar_por = col_ordem.selectbox(
+    "Ordenar por:", list(resumo_filtrado.columns),
+    index=list(resumo_filtrado.columns).index("oferta_x_carregamento_%"),
+)
+crescente = col_sentido.radio("Ordem:", ["Decrescente", "Crescente"]) == "Crescente"
+tamanho_pagina = col_tamanho.selectbox("Linhas por página:", [25, 50, 100, 200], index=1)
+
+posicoes_busca = buscar(resumo_filtrado, busca)
+total_linhas = len(posicoes_busca)
+n_paginas = total_paginas(total_linhas, tamanho_pagina)
+if st.session_state.get("pagina_tabela", 1) > n_paginas:
+    st.session_state["pagina_tabela"] = 1
+pagina = st.number_input("Página:", min_value=1, max_value=n_paginas, step=1, key="pagina_tabela")
+pagina_df = paginar(resumo_filtrado, posicoes_busca, ordenar_por, crescente, pagina, tamanho_pagina)
+inicio = (pagina - 1) * tamanho_pagina
+st.caption(
+    f"Linhas {inicio + 1 if total_linhas else 0}–{inicio + len(pagina_df)} de {total_linhas} "
+    f"(página {pagina} de {n_paginas})"
+)
+
+gb = GridOptionsBuilder.from_dataframe(pagina_df)
 gb.configure_side_bar()
 gridOptions = gb.build()
-AgGrid(resumo_filtrado, gridOptions=gridOptions, enable_enterprise_modules=True)
-
-csv = resumo_filtrado.to_csv(index=False).encode("utf-8")
-st.download_button(
-    label="📥 Baixar CSV filtrado",
-    data=csv,
-    file_name="resumo_motoristas_com_carregamentos.csv",
-    mime="text/csv",
+AgGrid(pagina_df, gridOptions=gridOptions, enable_enterprise_modules=True)
+
+cronometro.secao("exportacao")
+# arquivos gerados só no clique e reaproveitados enquanto carga e filtros não mudarem
+chave_exportacao = (
+    carregado_em.isoformat(), tuple(categoria_filtro), tuple(veiculo_filtro), cluster_filtro, min_aprov,
+    json.dumps(config_regras, sort_keys=True, default=str),
 )
+for coluna, (formato, info) in zip(st.columns(len(FORMATOS)), FORMATOS.items()):
+    coluna.download_button(
+        label=f"📥 Baixar {info.rotulo}",
+        data=lambda formato=formato: exportar_resumo(resumo_filtrado, chave_exportacao, formato),
+        file_name=f"resumo_motoristas_com_carregamentos.{info.extensao}",
+        mime=info.mime,
+        key=f"baixar_{formato}",
+    )
 
 # =====================================================
 # 13. MÓDULO DE CONTATO (NOVOS / INATIVOS) -> atualiza BASE_CADASTRO
@@ -506,55 +339,12 @@ st.download_button(
 # =====================================================
 # 8. CONTATO MOTORISTAS NOVOS / INATIVOS
 # =====================================================
+cronometro.secao("contato")
 st.subheader("📞 Registro de Contato com Motoristas Novos / Inativos")
 
 try:
-    cliente = conectar_sheets()
-    plan_base = cliente.open_by_key(SHEET_ID).worksheet("BASE_CADASTRO")
-
-    dados_base_raw = plan_base.get_all_values()
-    headers = [h.strip().lower().replace(" ", "_") for h in dados_base_raw[0]]
-    dados_base = pd.DataFrame(dados_base_raw[1:], columns=headers)
-    df_base = normalizar_colunas(dados_base)
-
-    # Corrigir nomes de colunas esperados
-    possiveis_ids = [c for c in df_base.columns if re.search(r"driver.*id", c)]
-    possiveis_nomes = [c for c in df_base.columns if re.search(r"driver.*name", c)]
-    possiveis_telefones = [c for c in df_base.columns if re.search(r"phone|telefone", c)]
-
-    if possiveis_ids:
-        df_base.rename(columns={possiveis_ids[0]: "driver_id"}, inplace=True)
-    if possiveis_nomes:
-        df_base.rename(columns={possiveis_nomes[0]: "driver_name"}, inplace=True)
-    if possiveis_telefones:
-        df_base.rename(columns={possiveis_telefones[0]: "phone_number"}, inplace=True)
-
-    if "contato" not in df_base.columns:
-        df_base["contato"] = ""
-
-    # Carregar aba de atualização
-    plan_atualizar = cliente.open_by_key(SHEET_ID).worksheet("SHEET_ATUALIZAR_CAD")
-    dados_atualizar = pd.DataFrame(plan_atualizar.get_all_records())
-    df_atualizar = normalizar_colunas(dados_atualizar)
-
-    # Corrigir nomes de colunas
-    possiveis_ids_a = [c for c in df_atualizar.columns if re.search(r"driver.*id", c)]
-    possiveis_nomes_a = [c for c in df_atualizar.columns if re.search(r"driver.*name", c)]
-    possiveis_telefones_a = [c for c in df_atualizar.columns if re.search(r"phone|telefone", c)]
-
-    if possiveis_ids_a:
-        df_atualizar.rename(columns={possiveis_ids_a[0]: "driver_id"}, inplace=True)
-    if possiveis_nomes_a:
-        df_atualizar.rename(columns={possiveis_nomes_a[0]: "driver_name"}, inplace=True)
-    if possiveis_telefones_a:
-        df_atualizar.rename(columns={possiveis_telefones_a[0]: "phone_number"}, inplace=True)
-
-    # Identificar novos e inativos
-    novos = pd.DataFrame()
-    if not df_atualizar.empty:
-        novos = df_atualizar[~df_atualizar["driver_id"].isin(df_base["driver_id"])]
-        colunas_disp = [c for c in ["driver_id", "driver_name", "phone_number"] if c in novos.columns]
-        novos = novos[colunas_disp]
+    # novos já calculados em cache (nem ida à planilha nem conversão das abas a cada rerun)
+    novos = carregar_novos_contato(df_cadastro, df_atual, carregado_em.isoformat())
 
     inativos = resumo[resumo["categoria"] == "Inativo"][["driver_id", "driver_name"]]
 
@@ -567,17 +357,57 @@ try:
         driver = st.selectbox("Selecione o motorista:", para_contato["driver_name"].unique())
         status = st.radio("Status do Contato:", ["Contato Efetivado", "Sem Interesse"], horizontal=True)
 
+        fila = obter_fila_contatos()
         if st.button("💾 Atualizar Contato"):
-            mask = df_base["driver_name"].astype(str).str.strip() == driver.strip()
-            if mask.any():
-                df_base.loc[mask, "contato"] = status
-            else:
-                novo = para_contato[para_contato["driver_name"] == driver].iloc[0].to_dict()
-                novo["contato"] = status
-                df_base = pd.concat([df_base, pd.DataFrame([novo])], ignore_index=True)
-
-            plan_base.update([df_base.columns.tolist()] + df_base.fillna("").astype(str).values.tolist())
+            # entra na fila e volta na hora; a gravação (só a célula 'contato' do
+            # motorista ou uma linha nova) é feita em segundo plano, com novas tentativas
+            novo = para_contato[para_contato["driver_name"] == driver].iloc[0].to_dict()
+            fila.enfileirar(driver, status, novo)
             st.success(f"📞 Status '{status}' registrado para {driver}!")
 
+        st.caption(f"Gravações pendentes: {fila.pendentes} · com falha: {len(fila.falhas)}")
+        if fila.falhas:
+            st.warning(f"Falha ao gravar contato de: {', '.join(fila.falhas)} ({fila.ultimo_erro})")
+            if st.button("🔁 Tentar novamente"):
+                fila.reenviar_falhas()
+
 except Exception as e:
     st.error(f"Erro ao processar módulo de contato: {e}")
+
+# =====================================================
+# 14. DIAGNÓSTICO (opcional)
+# =====================================================
+cronometro.fim()
+if st.sidebar.toggle("🩺 Mostrar diagnóstico"):
+    with st.sidebar.expander("🩺 Diagnóstico", expanded=True):
+        st.caption(
+            f"Carga de {carregado_em:%d/%m %H:%M:%S} · falhas seguidas: {atualizador.falhas_seguidas}"
+            + (" · atualizando" if atualizador.atualizando else "")
+        )
+        st.markdown("**Carga (por etapa)**")
+        st.dataframe(instrumentacao.resumo("carga"), hide_index=True)
+        st.markdown("**Rerun (por seção)**")
+        st.dataframe(instrumentacao.resumo("render"), hide_index=True)
+        exportacoes = instrumentacao.resumo("exportacao")
+        if not exportacoes.empty:
+            st.markdown("**Exportações**")
+            st.dataframe(exportacoes, hide_index=True)
+        st.markdown("**Cache de etapas**")
+        cache_etapas = obter_cache_etapas()
+        st.dataframe(taxa_cache(cache_etapas.acertos, cache_etapas.falhas), hide_index=True)
+        metricas_sheets = getattr(getattr(obter_fonte(), "cliente", None), "metricas", None)
+        if metricas_sheets is not None:
+            st.markdown("**Google Sheets (por método)**")
+            st.dataframe(metricas_sheets(), hide_index=True)
+        # memória dos dados carregados (deep=True percorre cada frame: só com o diagnóstico aberto)
+        st.markdown("**Memória dos dados**")
+        memoria = relatorio_memoria({
+            "resumo": resumo, "df_long": df_long, "df_cadastro": df_cadastro,
+            "df_atual": df_atual, "df_clusters": df_clusters, "cubo": cubo,
+        })
+        st.dataframe(memoria, hide_index=True)
+        st.caption(f"Total: {memoria['memoria_mb'].sum():.1f} MB")
+        esquemas = registro_padrao()
+        st.caption(f"Esquemas de abas: {esquemas.resolvidos} resolvido(s) · {esquemas.acertos} reaproveitado(s)")
+        fila = obter_fila_contatos()
+        st.caption(f"Fila de contatos: {fila.pendentes} pendente(s) · {len(fila.falhas)} com falha · {fila.gravados} gravado(s)")
@@ -0,0 +1,139 @@
+# atualizador.py
+# Atualização dos dados do dashboard em segundo plano (stale-while-revalidate):
+# a primeira carga é feita por quem pedir primeiro; depois uma thread recarrega
+# a cada `intervalo` segundos e troca o resultado só quando a nova carga dá certo.
+# Enquanto recarrega (ou se a recarga falhar) as sessões continuam recebendo a
+# última carga boa, sem esperar. Com `revisao`, a recarga só acontece quando a
+# revisão da fonte mudou: sem mudança, os dados (e o horário da carga) ficam como estão.
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple
+
+
+class AtualizadorDados:
+    """
+    Guarda a última carga boa de `carregar()` e a renova em segundo plano.
+    Falhas não apagam os dados: ficam em `ultimo_erro` e a próxima tentativa
+    vem com espera exponencial (a partir de `espera_erro`, no máximo `intervalo`).
+    `revisao()` (opcional) devolve a revisão atual da fonte, ou None se não souber;
+    `carregado_em` é quando a revisão em uso foi carregada e `verificado_em`, quando
+    ela foi conferida pela última vez.
+    """
+
+    def __init__(
+        self,
+        carregar: Callable[[], Any],
+        intervalo: float = 900.0,
+        espera_erro: float = 30.0,
+        revisao: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        self.carregar = carregar
+        self.intervalo = intervalo
+        self.espera_erro = espera_erro
+        self.revisao = revisao
+
+        self.carregado_em: Optional[datetime] = None
+        self.verificado_em: Optional[datetime] = None
+        self.revisao_carregada: Optional[str] = None
+        self.ultimo_erro: Optional[str] = None
+        self.falhas_seguidas = 0
+        self.atualizando = False
+        self._dados: Any = None
+        self._cond = threading.Condition()
+        self._carga_inicial = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pedido = False
+        self._parar = False
+
+    # ---------- interface usada pelo app ----------
+    def obter(self) -> Tuple[Any, datetime]:
+        """
+        Última carga boa e o horário dela. Só a primeira chamada espera a carga
+        (e levanta o erro, se ela falhar); as seguintes voltam na hora.
+        """
+        if self._dados is None:
+            with self._carga_inicial:
+                if self._dados is None:
+                    self._executar_carga(levantar=True)
+        with self._cond:
+            self._iniciar()
+            return self._dados, self.carregado_em
+
+    def solicitar(self) -> None:
+        """Pede uma recarga imediata, em segundo plano."""
+        with self._cond:
+            self._pedido = True
+            self._iniciar()
+            self._cond.notify()
+
+    def idade(self) -> Optional[float]:
+        """Segundos desde a carga da revisão em uso (None antes da primeira)."""
+        if self.carregado_em is None:
+            return None
+        return (datetime.now() - self.carregado_em).total_seconds()
+
+    def parar(self) -> None:
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    # ---------- worker ----------
+    def _iniciar(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._parar = False
+            self._thread = threading.Thread(target=self._laco, name="atualizador-dados", daemon=True)
+            self._thread.start()
+
+    def _proxima_espera(self) -> float:
+        if not self.falhas_seguidas:
+            return self.intervalo
+        espera = min(self.intervalo, self.espera_erro * 2 ** (self.falhas_seguidas - 1))
+        return espera * random.uniform(0.5, 1.0)
+
+    def _laco(self) -> None:
+        while True:
+            with self._cond:
+                limite = time.monotonic() + self._proxima_espera()
+                while not self._pedido and not self._parar:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._cond.wait(restante)
+                if self._parar:
+                    return
+                self._pedido = False
+            self._executar_carga(levantar=False)
+
+    def _executar_carga(self, levantar: bool) -> None:
+        with self._cond:
+            self.atualizando = True
+        try:
+            # lida antes da carga: se a fonte mudar durante ela, a próxima conferência recarrega
+            revisao = self.revisao() if self.revisao is not None else None
+            if revisao is not None and revisao == self.revisao_carregada and self._dados is not None:
+                with self._cond:
+                    self.verificado_em = datetime.now()
+                    self.atualizando = False
+                    self.falhas_seguidas = 0
+                    self.ultimo_erro = None
+                return
+            dados = self.carregar()
+        except Exception as e:
+            with self._cond:
+                self.atualizando = False
+                self.falhas_seguidas += 1
+                self.ultimo_erro = f"{type(e).__name__}: {e}"
+            if levantar:
+                raise
+            return
+        with self._cond:
+            self._dados = dados
+            self.revisao_carregada = revisao
+            self.carregado_em = self.verificado_em = datetime.now()
+            self.atualizando = False
+            self.falhas_seguidas = 0
+            self.ultimo_erro = None
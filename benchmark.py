@@ -0,0 +1,145 @@
+# benchmark.py
+# Mede tempo de parede e pico de memória de cada etapa do pipeline
+# sobre dados sintéticos, lidos pela FonteLocal como seriam em produção.
+#
+# Uso:
+#   python benchmark.py                          # 1k / 10k / 100k motoristas
+#   python benchmark.py --drivers 1000 5000 --datas 30 --sem-memoria
+#   python benchmark.py --json resultado.json
+#   python benchmark.py --classificacao --drivers 1000 5000   # apply x vetorizado
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from config import ABAS, ABA_OFERTA
+from dados_sinteticos import gerar_abas, salvar_abas
+from fontes import FonteLocal
+import pipeline
+
+
+class Medidor:
+    """
+    Acumula tempo (s) e pico de memória (MB) por etapa; usado como `medir` do pipeline.
+    Etapas podem ser aninhadas: o pico de uma etapa interna é repassado à externa.
+    """
+
+    def __init__(self, memoria: bool = True):
+        self.memoria = memoria
+        self.resultados: List[Dict] = []
+        self._picos: List[int] = []
+
+    @contextmanager
+    def __call__(self, etapa: str):
+        if self.memoria:
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            self._picos.append(base)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            tempo = time.perf_counter() - inicio
+            pico = None
+            if self.memoria:
+                pico_abs = max(tracemalloc.get_traced_memory()[1], self._picos.pop())
+                if self._picos:
+                    self._picos[-1] = max(self._picos[-1], pico_abs)
+                pico = (pico_abs - base) / 1024 ** 2
+            self.resultados.append({"etapa": etapa, "tempo_s": tempo, "pico_mb": pico})
+
+
+def executar(n_drivers: int, n_datas: int, n_clusters: int, memoria: bool = True, seed: int = 0) -> List[Dict]:
+    abas = gerar_abas(n_drivers, n_datas, n_clusters, seed)
+    medidor = Medidor(memoria)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        salvar_abas(abas, pasta)
+        del abas
+        if memoria:
+            tracemalloc.start()
+        try:
+            with medidor("total"):
+                with medidor("ingestao"):
+                    brutos = FonteLocal(pasta).ler_abas(ABAS)
+                pipeline.processar(brutos, medir=medidor)
+        finally:
+            if memoria:
+                tracemalloc.stop()
+
+    # "total" é a última entrada (o bloco externo fecha por último)
+    for r in medidor.resultados:
+        r.update(drivers=n_drivers, datas=n_datas, clusters=n_clusters)
+    return medidor.resultados
+
+
+def comparar_classificacao(n_drivers: int, n_datas: int, n_clusters: int, seed: int = 0) -> Dict:
+    """Compara o apply linha a linha (regra original) com `classificar_status` no frame derretido."""
+    abas = gerar_abas(n_drivers, n_datas, n_clusters, seed)
+    df_long = pipeline.preparar_oferta(abas[ABA_OFERTA])
+
+    inicio = time.perf_counter()
+    antigo = df_long["status"].apply(
+        lambda x: pd.Series(pipeline.verificar_disponibilidade_e_turno(x))
+    )
+    t_apply = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    disponivel, turno = pipeline.classificar_status(df_long["status"])
+    t_vetor = time.perf_counter() - inicio
+
+    iguais = bool(
+        (antigo[0].to_numpy() == disponivel).all()
+        and (antigo[1].to_numpy() == np.asarray(turno, dtype=object)).all()
+    )
+    return {"drivers": n_drivers, "celulas": len(df_long), "apply_s": t_apply,
+            "vetorizado_s": t_vetor, "speedup": t_apply / max(t_vetor, 1e-9), "iguais": iguais}
+
+
+def imprimir(resultados: List[Dict]) -> None:
+    print(f"{'drivers':>8} {'etapa':<20} {'tempo (s)':>10} {'pico (MB)':>10}")
+    for r in resultados:
+        pico = "-" if r["pico_mb"] is None else f"{r['pico_mb']:.1f}"
+        print(f"{r['drivers']:>8} {r['etapa']:<20} {r['tempo_s']:>10.3f} {pico:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de carregar_dados.")
+    parser.add_argument("--drivers", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--datas", type=int, default=60)
+    parser.add_argument("--clusters", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sem-memoria", action="store_true",
+                        help="não rastreia memória (tracemalloc deixa as etapas mais lentas)")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    parser.add_argument("--classificacao", action="store_true",
+                        help="compara apenas apply x vetorizado na classificação de disponibilidade/turno")
+    args = parser.parse_args(argv)
+
+    if args.classificacao:
+        for n in args.drivers:
+            r = comparar_classificacao(n, args.datas, args.clusters, seed=args.seed)
+            print(f"{r['drivers']:>8} drivers ({r['celulas']} células): apply {r['apply_s']:.3f}s | "
+                  f"vetorizado {r['vetorizado_s']:.3f}s | {r['speedup']:.0f}x | resultados iguais: {r['iguais']}")
+        return
+
+    todos = []
+    for n in args.drivers:
+        resultados = executar(n, args.datas, args.clusters, memoria=not args.sem_memoria, seed=args.seed)
+        imprimir(resultados)
+        print()
+        todos.extend(resultados)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(todos, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
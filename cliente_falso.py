@@ -0,0 +1,181 @@
+# cliente_falso.py
+# Cliente falso do Google Sheets, em memória, com a parte da interface do gspread
+# que o dashboard usa (open_by_key + values_* / get_lastUpdateTime da planilha).
+# Serve para exercitar cliente_sheets.ClienteComCota, FonteGoogleSheets e a fila
+# de contatos sem rede: falhas programadas por método (antes ou depois de aplicar
+# uma escrita), contagem de chamadas e leituras presas para simular concorrência.
+# Usado pelos testes em tests/ (ex.: tests/test_cliente_sheets.py).
+import re
+import threading
+from collections import Counter, defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+
+from cliente_sheets import ClienteComCota
+from fontes import FonteGoogleSheets
+
+
+class ErroHTTP(Exception):
+    """Erro com `code`, como o gspread.exceptions.APIError."""
+
+    def __init__(self, code: int, mensagem: str = ""):
+        super().__init__(mensagem or f"HTTP {code}")
+        self.code = code
+
+
+def _intervalo(nome: str) -> Tuple[str, str]:
+    """"'ABA'!D2" -> ("ABA", "D2"); sem "!" o intervalo é a aba inteira ("")."""
+    aba, _, intervalo = nome.partition("!")
+    return aba.strip("'").replace("''", "'"), intervalo
+
+
+def _coluna(letras: str) -> int:
+    """Letras da coluna em A1 -> índice 1-based."""
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + ord(letra) - ord("A") + 1
+    return indice
+
+
+class PlanilhaFalsa:
+    """
+    Abas em memória (grades: cabeçalho + linhas, como a API devolve).
+    `falhar(metodo, erro, vezes, depois_de_aplicar)` programa as próximas chamadas
+    de um método para levantar `erro`; com `depois_de_aplicar` a escrita vale na
+    planilha antes do erro (resposta perdida, como num timeout).
+    `chamadas` conta as chamadas que chegaram à planilha, por método.
+    Com `segurar_leituras` ligado, as leituras esperam `liberar()` (e `leitura_iniciada` é sinalizado).
+    """
+
+    def __init__(self, abas: Optional[Dict[str, List[List]]] = None):
+        self.abas = {aba: [list(linha) for linha in grade] for aba, grade in (abas or {}).items()}
+        self.revisao = 0
+        self.chamadas: Counter = Counter()
+        self._falhas: Dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.segurar_leituras = False
+        self.leitura_iniciada = threading.Event()
+        self._liberar = threading.Event()
+
+    # ---------- controle do teste ----------
+    def falhar(self, metodo: str, erro: Exception, vezes: int = 1, depois_de_aplicar: bool = False) -> None:
+        self._falhas[metodo].extend([(erro, depois_de_aplicar)] * vezes)
+
+    def liberar(self) -> None:
+        self._liberar.set()
+
+    def _chamar(self, metodo: str, aplicar):
+        with self._lock:
+            self.chamadas[metodo] += 1
+            erro, depois = self._falhas[metodo].popleft() if self._falhas[metodo] else (None, False)
+        if erro is not None and not depois:
+            raise erro
+        with self._lock:
+            resultado = aplicar()
+        if erro is not None:
+            raise erro
+        return resultado
+
+    # ---------- leitura ----------
+    def get_lastUpdateTime(self) -> str:
+        return self._chamar("get_lastUpdateTime", lambda: str(self.revisao))
+
+    def values_batch_get(self, ranges: List[str], params: Optional[Dict] = None) -> Dict:
+        if self.segurar_leituras:
+            self.leitura_iniciada.set()
+            self._liberar.wait()
+        colunas = (params or {}).get("majorDimension") == "COLUMNS"
+        return self._chamar("values_batch_get", lambda: {
+            "valueRanges": [{"values": self._ler(nome, colunas)} for nome in ranges],
+        })
+
+    def _ler(self, nome: str, colunas: bool) -> List[List]:
+        aba, intervalo = _intervalo(nome)
+        grade = self.abas.get(aba, [])
+        if not intervalo:
+            return [list(linha) for linha in grade]
+        inicio, _, _ = intervalo.partition(":")
+        if inicio.isdigit():
+            linha = int(inicio) - 1
+            return [list(grade[linha])] if linha < len(grade) else []
+        # coluna inteira ("F:F"), com as células vazias do fim cortadas como na API
+        c = _coluna(inicio) - 1
+        valores = [linha[c] if c < len(linha) else "" for linha in grade]
+        while valores and valores[-1] == "":
+            valores.pop()
+        return [valores] if colunas else [[v] for v in valores]
+
+    # ---------- escrita ----------
+    def values_batch_update(self, body: Dict) -> Dict:
+        def aplicar():
+            for item in body["data"]:
+                aba, intervalo = _intervalo(item["range"])
+                letras, linha = re.fullmatch(r"([A-Z]+)(\d+)", intervalo).groups()
+                grade = self.abas.setdefault(aba, [])
+                linha, coluna = int(linha), _coluna(letras)
+                while len(grade) < linha:
+                    grade.append([])
+                alvo = grade[linha - 1]
+                alvo.extend([""] * (coluna - len(alvo)))
+                alvo[coluna - 1] = item["values"][0][0]
+            self.revisao += 1
+            return {"totalUpdatedCells": len(body["data"])}
+        return self._chamar("values_batch_update", aplicar)
+
+    def values_append(self, range: str, params: Optional[Dict] = None, body: Optional[Dict] = None) -> Dict:
+        def aplicar():
+            aba, _ = _intervalo(range)
+            linhas = [list(l) for l in (body or {}).get("values", [])]
+            self.abas.setdefault(aba, []).extend(linhas)
+            self.revisao += 1
+            return {"updates": {"updatedRows": len(linhas)}}
+        return self._chamar("values_append", aplicar)
+
+
+class ClienteFalso:
+    """Entrega sempre a mesma PlanilhaFalsa em `open_by_key`."""
+
+    def __init__(self, planilha: PlanilhaFalsa):
+        self.planilha = planilha
+        self.aberturas = 0
+
+    def open_by_key(self, chave: str) -> PlanilhaFalsa:
+        self.aberturas += 1
+        return self.planilha
+
+
+class RelogioFalso:
+    """Relógio e `dormir` que só avançam quando alguém dorme (esperas guardadas em `esperas`)."""
+
+    def __init__(self):
+        self.agora = 0.0
+        self.esperas: List[float] = []
+
+    def __call__(self) -> float:
+        return self.agora
+
+    def dormir(self, segundos: float) -> None:
+        self.esperas.append(segundos)
+        self.agora += segundos
+
+
+# =====================================================
+# MONTAGEM PARA OS TESTES
+# =====================================================
+
+ABA = "BASE_CADASTRO"
+GRADE = [["Driver ID", "Driver Name", "Phone Number", "contato"], ["1", "Ana", "119", ""]]
+
+
+def montar(relogio: Optional[RelogioFalso] = None, **opcoes):
+    """(planilha falsa, fonte do Google Sheets sobre ela com controle de cota, relógio)."""
+    relogio = relogio or RelogioFalso()
+    planilha = PlanilhaFalsa({ABA: GRADE})
+    opcoes = {"leituras_por_minuto": 6000, "escritas_por_minuto": 6000, **opcoes}
+    cliente = ClienteComCota(ClienteFalso(planilha), dormir=relogio.dormir, relogio=relogio, **opcoes)
+    return planilha, FonteGoogleSheets(cliente, "falsa"), relogio
+
+
+def metrica(fonte: FonteGoogleSheets, metodo: str, coluna: str) -> float:
+    """Soma de uma coluna de `ClienteComCota.metricas()` para um método."""
+    df = fonte.cliente.metricas()
+    return df.loc[df["metodo"] == metodo, coluna].sum()
@@ -0,0 +1,227 @@
+# cliente_sheets.py
+# Envelope do cliente gspread com controle de cota: limite de requisições por
+# minuto (balde de tokens, separado para leitura e escrita), novas tentativas
+# com espera exponencial e jitter (leituras em 429/5xx/rede; escritas só em 429,
+# pois não são idempotentes), leituras idênticas simultâneas
+# resolvidas por uma única chamada e métricas de latência/contagem por método.
+#
+# Funciona com qualquer cliente que tenha `open_by_key` (ex.: o cliente falso em
+# memória de cliente_falso.py; repetições, deduplicação e espera de cota são
+# verificadas em tests/test_cliente_sheets.py); a planilha devolvida é envolvida do mesmo jeito.
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+# métodos da planilha (gspread.Spreadsheet) que contam na cota de leitura / escrita
+METODOS_LEITURA = {
+    "get_lastUpdateTime", "worksheets", "worksheet", "fetch_sheet_metadata",
+    "values_get", "values_batch_get",
+}
+METODOS_ESCRITA = {
+    "values_update", "values_batch_update", "values_append", "values_clear",
+    "values_batch_clear", "batch_update",
+}
+
+# respostas HTTP que valem nova tentativa
+STATUS_REPETIR = {429, 500, 502, 503, 504}
+
+
+def status_http(erro: Exception) -> Optional[int]:
+    """Código HTTP de um erro do gspread/requests (None se não houver)."""
+    codigo = getattr(erro, "code", None)
+    if isinstance(codigo, int) and codigo > 0:
+        return codigo
+    resposta = getattr(erro, "response", None)
+    return getattr(resposta, "status_code", None)
+
+
+def deve_repetir(erro: Exception, tipo: str = "leitura") -> bool:
+    """
+    Leituras repetem em 429/5xx e falhas de rede. Escritas só em 429 (recusada
+    antes de ser aplicada): depois de timeout/5xx a escrita pode já ter valido
+    (um append repetido duplica linhas), e quem decide é quem escreve — a
+    FilaContatos relê a aba e replaneja.
+    """
+    status = status_http(erro)
+    if tipo == "escrita":
+        return status == 429
+    if status in STATUS_REPETIR:
+        return True
+    # falhas de rede (timeout, conexão derrubada) também são transitórias
+    try:
+        from requests.exceptions import ConnectionError as ErroConexao, Timeout
+    except ImportError:
+        ErroConexao = Timeout = ()
+    return isinstance(erro, (ConnectionError, TimeoutError, ErroConexao, Timeout))
+
+
+class BaldeTokens:
+    """Balde de tokens: até `capacidade` requisições de uma vez, repostas a `por_minuto`/min."""
+
+    def __init__(self, por_minuto: float, capacidade: Optional[float] = None, relogio: Callable[[], float] = time.monotonic):
+        self.taxa = por_minuto / 60.0
+        self.capacidade = capacidade if capacidade is not None else max(1.0, por_minuto / 6)
+        self.tokens = self.capacidade
+        self.relogio = relogio
+        self._atualizado = relogio()
+        self._lock = threading.Lock()
+
+    def consumir(self, dormir: Callable[[float], None] = time.sleep) -> float:
+        """Retira um token, esperando se preciso. Retorna o tempo esperado (s)."""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                agora = self.relogio()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self._atualizado) * self.taxa)
+                self._atualizado = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return esperado
+                falta = (1 - self.tokens) / self.taxa
+            dormir(falta)
+            esperado += falta
+
+
+class ControleCota:
+    """Estado compartilhado entre cliente e planilhas: baldes, chamadas em andamento e métricas."""
+
+    def __init__(self, leituras_por_minuto: float = 60, escritas_por_minuto: float = 60,
+                 max_tentativas: int = 5, espera_inicial: float = 1.0, espera_maxima: float = 32.0,
+                 dormir: Callable[[float], None] = time.sleep, relogio: Callable[[], float] = time.monotonic):
+        self.baldes = {
+            "leitura": BaldeTokens(leituras_por_minuto, relogio=relogio),
+            "escrita": BaldeTokens(escritas_por_minuto, relogio=relogio),
+        }
+        self.max_tentativas = max_tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.dormir = dormir
+        self._em_andamento: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._metricas: Dict[str, Dict[str, float]] = {}
+
+    # ---------- métricas ----------
+    def _registrar(self, metodo: str, **valores) -> None:
+        with self._lock:
+            m = self._metricas.setdefault(metodo, {
+                "chamadas": 0, "erros": 0, "repeticoes": 0, "deduplicadas": 0,
+                "latencia_total_s": 0.0, "latencia_max_s": 0.0, "espera_cota_s": 0.0,
+            })
+            for chave, valor in valores.items():
+                if chave == "latencia_max_s":
+                    m[chave] = max(m[chave], valor)
+                else:
+                    m[chave] += valor
+
+    def metricas(self) -> pd.DataFrame:
+        """Uma linha por método: chamadas, erros, repetições, deduplicadas, latência e espera de cota."""
+        with self._lock:
+            linhas = [{"metodo": k, **v} for k, v in self._metricas.items()]
+        df = pd.DataFrame(linhas, columns=[
+            "metodo", "chamadas", "erros", "repeticoes", "deduplicadas",
+            "latencia_total_s", "latencia_max_s", "espera_cota_s",
+        ])
+        df["latencia_media_s"] = df["latencia_total_s"] / df["chamadas"].where(df["chamadas"] > 0)
+        return df
+
+    # ---------- execução ----------
+    def executar(self, metodo: str, tipo: str, funcao: Callable, args: tuple, kwargs: dict, chave: Optional[Tuple] = None):
+        """Executa a chamada com cota e novas tentativas; leituras com a mesma `chave` em andamento são compartilhadas."""
+        if chave is not None:
+            with self._lock:
+                futuro = self._em_andamento.get(chave)
+                dono = futuro is None
+                if dono:
+                    futuro = self._em_andamento[chave] = Future()
+            if not dono:
+                self._registrar(metodo, deduplicadas=1)
+                return futuro.result()
+            try:
+                resultado = self._com_tentativas(metodo, tipo, funcao, args, kwargs)
+            except BaseException as e:
+                futuro.set_exception(e)
+                raise
+            else:
+                futuro.set_result(resultado)
+                return resultado
+            finally:
+                with self._lock:
+                    self._em_andamento.pop(chave, None)
+        return self._com_tentativas(metodo, tipo, funcao, args, kwargs)
+
+    def _com_tentativas(self, metodo: str, tipo: str, funcao: Callable, args: tuple, kwargs: dict):
+        tentativa = 0
+        while True:
+            espera = self.baldes[tipo].consumir(self.dormir)
+            inicio = time.perf_counter()
+            try:
+                resultado = funcao(*args, **kwargs)
+            except Exception as e:
+                latencia = time.perf_counter() - inicio
+                self._registrar(metodo, chamadas=1, erros=1, latencia_total_s=latencia,
+                                latencia_max_s=latencia, espera_cota_s=espera)
+                tentativa += 1
+                if tentativa >= self.max_tentativas or not deve_repetir(e, tipo):
+                    raise
+                self._registrar(metodo, repeticoes=1)
+                # espera exponencial com jitter completo
+                self.dormir(random.uniform(0, min(self.espera_maxima, self.espera_inicial * 2 ** (tentativa - 1))))
+                continue
+            latencia = time.perf_counter() - inicio
+            self._registrar(metodo, chamadas=1, latencia_total_s=latencia,
+                            latencia_max_s=latencia, espera_cota_s=espera)
+            return resultado
+
+
+def _chave_chamada(metodo: str, alvo: str, args: tuple, kwargs: dict) -> Tuple:
+    return (alvo, metodo, repr(args), repr(sorted(kwargs.items())))
+
+
+class PlanilhaComCota:
+    """Envolve uma planilha gspread: métodos de leitura/escrita passam pelo ControleCota."""
+
+    def __init__(self, planilha, controle: ControleCota, identificador: str):
+        self._planilha = planilha
+        self._controle = controle
+        self._identificador = identificador
+
+    def __getattr__(self, nome):
+        atributo = getattr(self._planilha, nome)
+        if not callable(atributo) or (nome not in METODOS_LEITURA and nome not in METODOS_ESCRITA):
+            return atributo
+        leitura = nome in METODOS_LEITURA
+
+        def chamar(*args, **kwargs):
+            chave = _chave_chamada(nome, self._identificador, args, kwargs) if leitura else None
+            return self._controle.executar(nome, "leitura" if leitura else "escrita", atributo, args, kwargs, chave)
+        return chamar
+
+
+class ClienteComCota:
+    """
+    Envolve um cliente gspread (ou um falso, com `open_by_key`). Uso:
+        cliente = ClienteComCota(gspread.authorize(creds), leituras_por_minuto=60)
+        FonteGoogleSheets(cliente, SHEET_ID)
+    `metricas()` devolve as contagens e latências por método.
+    """
+
+    def __init__(self, cliente, controle: Optional[ControleCota] = None, **opcoes):
+        self.cliente = cliente
+        self.controle = controle or ControleCota(**opcoes)
+
+    def open_by_key(self, chave: str) -> PlanilhaComCota:
+        planilha = self.controle.executar(
+            "open_by_key", "leitura", self.cliente.open_by_key, (chave,), {},
+            _chave_chamada("open_by_key", "", (chave,), {}),
+        )
+        return PlanilhaComCota(planilha, self.controle, chave)
+
+    def metricas(self) -> pd.DataFrame:
+        return self.controle.metricas()
+
+    def __getattr__(self, nome):
+        return getattr(self.cliente, nome)
@@ -0,0 +1,47 @@
+# config.py
+# Configurações compartilhadas entre o dashboard (app.py) e os módulos de dados.
+import os
+
+SERVICE_ACCOUNT_FILE = "credentials.json"  # <-- confirme que esse arquivo existe
+SHEET_ID = "1PwudX5L5c_zuQJXSCzAyZSdxTVRY0MMcqzGqS-up7nw"
+
+# Abas
+ABA_OFERTA = "SHEET_OFERTA"
+ABA_CARREG = "SHEET_CARREG"
+ABA_CADASTRO = "BASE_CADASTRO"            # aba fixa onde escreveremos 'contato'
+ABA_ATUALIZAR = "SHEET_ATUALIZAR_CAD"
+
+ABAS = [ABA_OFERTA, ABA_CARREG, ABA_CADASTRO, ABA_ATUALIZAR]
+
+# Cache persistente (snapshots Arrow) das abas e do resultado do pipeline
+PASTA_CACHE = os.environ.get("DRIVERS_CACHE", ".cache_drivers")
+
+# Atualização incremental da SHEET_OFERTA (só colunas de data novas + últimas
+# JANELA_REVISAO datas, que ainda podem ser editadas). DRIVERS_INCREMENTAL=0 desliga.
+INCREMENTAL_OFERTA = os.environ.get("DRIVERS_INCREMENTAL", "1") != "0"
+JANELA_REVISAO = int(os.environ.get("DRIVERS_JANELA_REVISAO", "2"))
+# Edições em datas fora da janela só aparecem numa releitura completa: o estado
+# incremental mais velho que isso (horas) é reconstruído na próxima carga. 0 = nunca.
+RECONSTRUCAO_OFERTA_HORAS = float(os.environ.get("DRIVERS_RECONSTRUCAO_OFERTA_HORAS", "24"))
+
+# Threads para ingerir as abas (e atualizar a oferta incremental) em paralelo; 1 = em sequência.
+# O download é sempre uma só leitura em lote (values:batchGet): uma requisição por aba
+# traria a primeira aba antes, mas gastaria uma unidade da cota de leitura por aba
+# (cota por minuto, ver cliente_sheets) e pagaria a latência de uma chamada por aba.
+PARALELISMO_ABAS = int(os.environ.get("DRIVERS_PARALELISMO_ABAS", "4"))
+
+# Fonte local (CSV/JSON por aba). Se definida, substitui o Google Sheets.
+ENV_FONTE_LOCAL = "DRIVERS_FONTE_LOCAL"
+
+# Cota da API do Google Sheets (requisições por minuto) usada pelo cliente com controle de cota
+SHEETS_LEITURAS_POR_MINUTO = float(os.environ.get("DRIVERS_SHEETS_LEITURAS_MIN", "60"))
+SHEETS_ESCRITAS_POR_MINUTO = float(os.environ.get("DRIVERS_SHEETS_ESCRITAS_MIN", "60"))
+
+# Acima deste número de motoristas filtrados a dispersão vira WebGL com pontos agrupados
+LIMITE_PONTOS_GRAFICO = int(os.environ.get("DRIVERS_LIMITE_PONTOS", "5000"))
+
+# Recarga dos dados do dashboard em segundo plano (segundos); as sessões usam a última carga boa
+INTERVALO_ATUALIZACAO = float(os.environ.get("DRIVERS_INTERVALO_ATUALIZACAO", "900"))
+
+# Log JSON das medições de tempo (diagnostico.py): "-" = stderr, outro valor = arquivo; vazio desliga
+ARQUIVO_LOG_DIAGNOSTICO = os.environ.get("DRIVERS_LOG_DIAGNOSTICO", "")
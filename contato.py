@@ -0,0 +1,212 @@
+# contato.py
+# Módulo de contato (motoristas novos / inativos): leitura das bases e registro
+# do status de contato na BASE_CADASTRO por escrita pontual — só a célula
+# `contato` das linhas do motorista (ou uma linha nova) vai para a planilha,
+# nunca a aba inteira. As escritas do app passam por uma fila em segundo plano.
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from config import ABA_CADASTRO
+from esquemas import registro_padrao
+from fontes import FonteDados
+
+COLUNA_CONTATO = "contato"
+
+
+def _colunas_da_grade(cabecalho: List, aba: str) -> List[str]:
+    """
+    Nome interno de cada coluna da grade, na mesma ordem da planilha (lista nova, pode ser alterada).
+    Mesmo esquema que a carga usa para a aba (pipeline.preparar_cadastros).
+    """
+    return list(registro_padrao().obter("cadastro", cabecalho, aba).colunas)
+
+
+def planejar_registros(grade: List[List], registros: List[Dict], aba: str = ABA_CADASTRO) -> Dict:
+    """
+    Escritas necessárias para registrar vários contatos na grade da BASE_CADASTRO
+    (cabeçalho + linhas, como lida da planilha). Cada registro tem driver_name,
+    status e, opcionalmente, `novo` (driver_id, driver_name, phone_number).
+    Linhas/colunas 1-based como na planilha.
+    Retorna {"celulas": [(linha, coluna, valor)], "linhas_novas": [[...]]}:
+    a célula `contato` de cada linha com o driver_name ou, se não houver nenhuma,
+    uma linha nova montada a partir de `novo`.
+    """
+    cabecalho = list(grade[0]) if grade else []
+    colunas = _colunas_da_grade(cabecalho, aba)
+    celulas = []
+
+    if COLUNA_CONTATO in colunas:
+        col_contato = colunas.index(COLUNA_CONTATO)
+    else:
+        # coluna ainda não existe: cria o cabeçalho logo após a última coluna
+        col_contato = len(colunas)
+        colunas.append(COLUNA_CONTATO)
+        celulas.append((1, col_contato + 1, COLUNA_CONTATO))
+
+    # driver_name -> linhas da planilha
+    linhas_por_nome: Dict[str, List[int]] = {}
+    if "driver_name" in colunas:
+        col_nome = colunas.index("driver_name")
+        for i, linha in enumerate(grade[1:], start=2):
+            if col_nome < len(linha):
+                linhas_por_nome.setdefault(str(linha[col_nome]).strip(), []).append(i)
+
+    linhas_novas = []
+    for registro in registros:
+        nome, status = str(registro["driver_name"]).strip(), registro["status"]
+        linhas = linhas_por_nome.get(nome)
+        if linhas:
+            celulas += [(linha, col_contato + 1, status) for linha in linhas]
+            continue
+        novo = registro.get("novo") or {"driver_name": registro["driver_name"]}
+        valores = {k: v for k, v in novo.items() if pd.notna(v)}
+        valores[COLUNA_CONTATO] = status
+        linhas_novas.append([str(valores.get(c, "")) for c in colunas])
+    return {"celulas": celulas, "linhas_novas": linhas_novas}
+
+
+def aplicar_plano(fonte: FonteDados, aba: str, plano: Dict) -> None:
+    """Uma atualização em lote das células e, se preciso, um append das linhas novas."""
+    if plano["celulas"]:
+        fonte.atualizar_celulas(aba, plano["celulas"])
+    if plano["linhas_novas"]:
+        fonte.anexar_linhas(aba, plano["linhas_novas"])
+
+
+# =====================================================
+# FILA DE ESCRITA EM SEGUNDO PLANO
+# =====================================================
+
+class FilaContatos:
+    """
+    Fila write-behind dos registros de contato. `enfileirar` só guarda o pedido e
+    volta na hora; uma thread em segundo plano grava os pendentes em lote
+    (uma leitura da aba + um batchUpdate + no máximo um append por rodada).
+    Vários pedidos para o mesmo motorista antes da gravação viram um só (vale o último).
+    Falhas são repetidas com espera exponencial; depois de `max_tentativas` o
+    pedido vai para `falhas` e pode ser reenviado com `reenviar_falhas`.
+    """
+
+    def __init__(self, fonte: FonteDados, aba: str, ao_gravar: Optional[Callable[[], None]] = None,
+                 max_tentativas: int = 5, espera_inicial: float = 1.0, espera_maxima: float = 60.0):
+        self.fonte = fonte
+        self.aba = aba
+        self.ao_gravar = ao_gravar
+        self.max_tentativas = max_tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+
+        self._pendentes: Dict[str, Dict] = {}
+        self.falhas: Dict[str, Dict] = {}
+        self.gravados = 0
+        self.ultimo_erro: Optional[str] = None
+        self._gravando = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._parar = False
+
+    # ---------- interface usada pelo app ----------
+    def enfileirar(self, driver_name: str, status: str, novo: Optional[Dict] = None) -> None:
+        chave = str(driver_name).strip()
+        with self._cond:
+            self.falhas.pop(chave, None)
+            self._pendentes[chave] = {
+                "driver_name": driver_name, "status": status, "novo": novo,
+                "tentativas": 0, "proxima": 0.0,
+            }
+            self._iniciar()
+            self._cond.notify()
+
+    @property
+    def pendentes(self) -> int:
+        with self._cond:
+            return len(self._pendentes) + self._gravando
+
+    def reenviar_falhas(self) -> None:
+        with self._cond:
+            for chave, registro in self.falhas.items():
+                self._pendentes.setdefault(chave, {**registro, "tentativas": 0, "proxima": 0.0})
+            self.falhas.clear()
+            self._iniciar()
+            self._cond.notify()
+
+    def aguardar(self, timeout: Optional[float] = None) -> bool:
+        """Espera a fila esvaziar (pendentes gravados ou movidos para falhas)."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pendentes or self._gravando:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._cond.wait(restante)
+            return True
+
+    def parar(self) -> None:
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    # ---------- worker ----------
+    def _iniciar(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._parar = False
+            self._thread = threading.Thread(target=self._executar, name="fila-contatos", daemon=True)
+            self._thread.start()
+
+    def _executar(self) -> None:
+        while True:
+            with self._cond:
+                lote = self._proximo_lote()
+                if lote is None:
+                    return
+                self._gravando = len(lote)
+            try:
+                grade = self.fonte.ler_grades([self.aba])[self.aba]
+                aplicar_plano(self.fonte, self.aba, planejar_registros(grade, list(lote.values()), self.aba))
+            except Exception as e:
+                with self._cond:
+                    self._gravando = 0
+                    self._reprogramar(lote, e)
+                    self._cond.notify_all()
+                continue
+            with self._cond:
+                self._gravando = 0
+                self.gravados += len(lote)
+                self._cond.notify_all()
+            if self.ao_gravar is not None:
+                self.ao_gravar()
+
+    def _proximo_lote(self) -> Optional[Dict[str, Dict]]:
+        """Retira da fila os pedidos prontos; espera enquanto só houver pedidos em espera. None = parar."""
+        while True:
+            if self._parar:
+                return None
+            agora = time.monotonic()
+            prontos = [k for k, r in self._pendentes.items() if r["proxima"] <= agora]
+            if prontos:
+                return {k: self._pendentes.pop(k) for k in prontos}
+            if not self._pendentes:
+                self._cond.notify_all()
+                self._cond.wait()
+            else:
+                self._cond.wait(min(r["proxima"] for r in self._pendentes.values()) - agora)
+
+    def _reprogramar(self, lote: Dict[str, Dict], erro: Exception) -> None:
+        self.ultimo_erro = f"{type(erro).__name__}: {erro}"
+        agora = time.monotonic()
+        for chave, registro in lote.items():
+            if chave in self._pendentes:
+                continue  # chegou pedido mais novo para o motorista: ele substitui este
+            registro["tentativas"] += 1
+            if registro["tentativas"] >= self.max_tentativas:
+                self.falhas[chave] = {**registro, "erro": self.ultimo_erro}
+                continue
+            espera = min(self.espera_maxima, self.espera_inicial * 2 ** (registro["tentativas"] - 1))
+            registro["proxima"] = agora + espera * random.uniform(0.5, 1.0)
+            self._pendentes[chave] = registro
@@ -0,0 +1,138 @@
+# dados_sinteticos.py
+# Gerador de planilhas sintéticas com o mesmo formato das abas reais
+# (SHEET_OFERTA, SHEET_CARREG, BASE_CADASTRO, SHEET_ATUALIZAR_CAD).
+#
+# Uso:
+#   python dados_sinteticos.py --drivers 1000 --datas 60 --clusters 8 --saida fixtures/
+#   DRIVERS_FONTE_LOCAL=fixtures/ streamlit run app.py
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from config import ABA_OFERTA, ABA_CARREG, ABA_CADASTRO, ABA_ATUALIZAR
+
+# valores de status encontrados na SHEET_OFERTA, com pesos aproximados
+STATUS_OFERTA = [
+    ("", 0.30),
+    ("--", 0.10),
+    ("Not Available", 0.10),
+    ("05:15-09:00", 0.22),
+    ("11:45-14:30", 0.13),
+    ("05:15-09:00, 11:45-14:30", 0.10),
+    ("16:00-19:30", 0.05),
+]
+
+
+def gerar_abas(
+    n_drivers: int,
+    n_datas: int = 60,
+    n_clusters: int = 8,
+    seed: int = 0,
+    data_inicial: date = date(2025, 1, 1),
+) -> Dict[str, pd.DataFrame]:
+    """Gera N motoristas × D colunas de data × K clusters nas quatro abas do dashboard."""
+    rng = np.random.default_rng(seed)
+
+    driver_ids = np.arange(100000, 100000 + n_drivers)
+    nomes = np.array([f"Motorista {i:06d}" for i in range(n_drivers)], dtype=object)
+    clusters = [f"{k + 1:02d}. CLUSTER {chr(65 + k % 26)}{k // 26 or ''}" for k in range(n_clusters)]
+
+    # cada motorista pertence a 1-3 clusters
+    n_por_driver = rng.integers(1, min(3, n_clusters) + 1, size=n_drivers)
+    cluster_txt = [
+        ", ".join(rng.choice(clusters, size=n, replace=False)) for n in n_por_driver
+    ]
+
+    datas = [data_inicial + timedelta(days=d) for d in range(n_datas)]
+    colunas_datas = [d.strftime("%Y-%m-%d") for d in datas]
+
+    # perfis de engajamento diferentes por motorista
+    valores = np.array([v for v, _ in STATUS_OFERTA], dtype=object)
+    pesos = np.array([p for _, p in STATUS_OFERTA])
+    engajamento = rng.beta(2, 2, size=n_drivers)
+    oferta = rng.random((n_drivers, n_datas)) < engajamento[:, None]
+    idx_disp = rng.choice(np.arange(3, len(valores)), size=(n_drivers, n_datas), p=pesos[3:] / pesos[3:].sum())
+    idx_indisp = rng.choice(np.arange(3), size=(n_drivers, n_datas), p=pesos[:3] / pesos[:3].sum())
+    status = valores[np.where(oferta, idx_disp, idx_indisp)]
+
+    df_oferta = pd.DataFrame({
+        "Driver ID": driver_ids,
+        "Driver Name": nomes,
+        "Cluster": cluster_txt,
+        "Vehicle Type": rng.choice(["MOTO", "CARRO", "VAN", "FIORINO"], size=n_drivers),
+        "No Show Time": rng.integers(0, 5, size=n_drivers),
+    })
+    df_oferta = pd.concat([df_oferta, pd.DataFrame(status, columns=colunas_datas)], axis=1)
+
+    # carregamentos: parte dos dias ofertados vira carregamento (uma ou mais tarefas)
+    carregou = oferta & (rng.random((n_drivers, n_datas)) < 0.6)
+    linhas, cols = np.nonzero(carregou)
+    repet = rng.integers(1, 3, size=len(linhas))
+    linhas, cols = np.repeat(linhas, repet), np.repeat(cols, repet)
+    df_carreg = pd.DataFrame({
+        "Task ID": np.arange(len(linhas)),
+        "Driver ID": driver_ids[linhas],
+        "Driver Name": nomes[linhas],
+        "Delivery Date": np.array(colunas_datas, dtype=object)[cols],
+    })
+
+    telefones = np.array([f"(11) 9{n:04d}-{(n * 7) % 10000:04d}" for n in range(n_drivers)], dtype=object)
+
+    # base de cadastro: ~85% dos motoristas, com coluna de contato
+    no_cadastro = rng.random(n_drivers) < 0.85
+    df_cadastro = pd.DataFrame({
+        "Driver ID": driver_ids[no_cadastro],
+        "Driver Name": nomes[no_cadastro],
+        "Phone Number": telefones[no_cadastro],
+        "contato": "",
+    })
+
+    # atualização: motoristas fora do cadastro + uma amostra dos existentes
+    na_atualizacao = ~no_cadastro | (rng.random(n_drivers) < 0.05)
+    df_atual = pd.DataFrame({
+        "Driver ID": driver_ids[na_atualizacao],
+        "Driver Name": nomes[na_atualizacao],
+        "Phone Number": telefones[na_atualizacao],
+    })
+
+    return {
+        ABA_OFERTA: df_oferta,
+        ABA_CARREG: df_carreg,
+        ABA_CADASTRO: df_cadastro,
+        ABA_ATUALIZAR: df_atual,
+    }
+
+
+def salvar_abas(abas: Dict[str, pd.DataFrame], pasta, formato: str = "csv") -> Path:
+    """Grava cada aba como `<pasta>/<ABA>.csv` (ou .json), no formato lido pela FonteLocal."""
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    for aba, df in abas.items():
+        if formato == "json":
+            df.to_json(pasta / f"{aba}.json", orient="records", force_ascii=False)
+        else:
+            df.to_csv(pasta / f"{aba}.csv", index=False)
+    return pasta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera planilhas sintéticas para o dashboard.")
+    parser.add_argument("--drivers", type=int, default=1000)
+    parser.add_argument("--datas", type=int, default=60)
+    parser.add_argument("--clusters", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--formato", choices=["csv", "json"], default="csv")
+    parser.add_argument("--saida", default="fixtures")
+    args = parser.parse_args(argv)
+
+    abas = gerar_abas(args.drivers, args.datas, args.clusters, args.seed)
+    pasta = salvar_abas(abas, args.saida, args.formato)
+    print(f"✅ {args.drivers} motoristas × {args.datas} datas × {args.clusters} clusters gravados em {pasta}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# diagnostico.py
+# Instrumentação das etapas quentes: tempo e linhas de cada etapa da carga
+# (download e ingestão de cada aba, etapas do pipeline, snapshot) e de cada
+# seção renderizada pelo app. Cada medição vira uma linha de log em JSON
+# (logger "drivers.diagnostico") e fica nas últimas medições em memória, que o
+# painel de diagnóstico do app mostra junto com acertos de cache e a latência
+# das chamadas ao Google Sheets.
+#
+# `Instrumentacao` tem a mesma interface do `medir` de pipeline.processar
+# (um context manager por etapa); o dict devolvido no `with` aceita campos
+# extras, como "linhas".
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger("drivers.diagnostico")
+
+
+def configurar_log(destino: Optional[str]) -> None:
+    """Liga o log JSON: "-" escreve em stderr, outro valor é o caminho de um arquivo (append)."""
+    if not destino or any(getattr(h, "_diagnostico", False) for h in logger.handlers):
+        return
+    handler = logging.StreamHandler(sys.stderr) if destino == "-" else logging.FileHandler(destino, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._diagnostico = True
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def contar_linhas(valor) -> Optional[int]:
+    """Linhas de um DataFrame ou de uma grade sem o cabeçalho (ou soma das linhas de uma tupla deles)."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return len(valor)
+    if isinstance(valor, list):
+        return max(len(valor) - 1, 0)
+    if isinstance(valor, tuple):
+        contagens = [contar_linhas(v) for v in valor]
+        contagens = [c for c in contagens if c is not None]
+        return sum(contagens) if contagens else None
+    return None
+
+
+def anotar_linhas(registro, valor) -> None:
+    """Guarda as linhas de `valor` no registro da medição (ignorado se o `medir` não devolver um dict)."""
+    if isinstance(registro, dict):
+        registro["linhas"] = contar_linhas(valor)
+
+
+class Instrumentacao:
+    """Registra medições por etapa: `with instrumentacao("etapa", grupo="carga") as m: ...; m["linhas"] = n`."""
+
+    def __init__(self, maximo: int = 1000):
+        self._medicoes: deque = deque(maxlen=maximo)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def __call__(self, etapa: str, grupo: str = "carga", **campos):
+        registro: Dict = dict(campos)
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            yield registro
+        except BaseException as e:
+            erro = type(e).__name__
+            raise
+        finally:
+            self.registrar(etapa, grupo, time.perf_counter() - inicio, erro=erro, **registro)
+
+    def registrar(self, etapa: str, grupo: str, tempo_s: float, **campos) -> None:
+        medicao = {
+            "quando": datetime.now().isoformat(timespec="milliseconds"),
+            "grupo": grupo,
+            "etapa": etapa,
+            "tempo_s": round(tempo_s, 6),
+            "thread": threading.current_thread().name,
+            **{k: v for k, v in campos.items() if v is not None},
+        }
+        with self._lock:
+            self._medicoes.append(medicao)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(medicao, ensure_ascii=False, default=str))
+
+    def medir(self, grupo: str):
+        """Função `medir(etapa)` presa a um grupo, para repassar ao pipeline/snapshot."""
+        return lambda etapa: self(etapa, grupo=grupo)
+
+    def medicoes(self, grupo: Optional[str] = None) -> pd.DataFrame:
+        with self._lock:
+            linhas: List[Dict] = [m for m in self._medicoes if grupo is None or m["grupo"] == grupo]
+        return pd.DataFrame(linhas, columns=None if linhas else ["quando", "grupo", "etapa", "tempo_s"])
+
+    def resumo(self, grupo: Optional[str] = None) -> pd.DataFrame:
+        """Por etapa: quantas medições, última, média e máxima (s), e linhas da última."""
+        df = self.medicoes(grupo)
+        if df.empty:
+            return pd.DataFrame(columns=["grupo", "etapa", "vezes", "ultimo_s", "medio_s", "maximo_s", "linhas"])
+        if "linhas" not in df.columns:
+            df["linhas"] = None
+        resumo = df.groupby(["grupo", "etapa"], sort=False).agg(
+            vezes=("tempo_s", "size"), ultimo_s=("tempo_s", "last"), medio_s=("tempo_s", "mean"),
+            maximo_s=("tempo_s", "max"), linhas=("linhas", "last"),
+        )
+        return resumo.reset_index().round({"ultimo_s": 4, "medio_s": 4, "maximo_s": 4})
+
+
+class CronometroSecoes:
+    """
+    Tempo de cada seção de um rerun do app, sem reindentar o script:
+    `secao(nome)` fecha a seção anterior e abre a próxima; `fim()` fecha a última.
+    """
+
+    def __init__(self, instrumentacao: Instrumentacao, grupo: str = "render"):
+        self.instrumentacao = instrumentacao
+        self.grupo = grupo
+        self._atual = None
+
+    def secao(self, nome: str, **campos) -> None:
+        self.fim()
+        self._atual = (nome, campos, time.perf_counter())
+
+    def fim(self) -> None:
+        if self._atual is not None:
+            nome, campos, inicio = self._atual
+            self._atual = None
+            self.instrumentacao.registrar(nome, self.grupo, time.perf_counter() - inicio, **campos)
+
+
+def taxa_cache(acertos: Dict[str, int], falhas: Dict[str, int]) -> pd.DataFrame:
+    """Acertos, falhas e taxa de acerto (%) por etapa de um CacheEtapas."""
+    etapas = sorted(set(acertos) | set(falhas))
+    df = pd.DataFrame({
+        "etapa": etapas,
+        "acertos": [acertos.get(e, 0) for e in etapas],
+        "falhas": [falhas.get(e, 0) for e in etapas],
+    })
+    total = df["acertos"] + df["falhas"]
+    df["taxa_%"] = (100 * df["acertos"] / total.where(total > 0)).round(1)
+    return df
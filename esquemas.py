@@ -0,0 +1,252 @@
+# esquemas.py
+# Registro de esquemas das abas: o cabeçalho de cada aba é identificado por uma
+# impressão digital e o mapeamento resolvido (nome canônico de cada coluna,
+# colunas de data, coluna de telefone) é calculado uma única vez por impressão,
+# guardado em memória e em <PASTA_CACHE>/esquemas.json. Cada etapa renomeia a
+# aba inteira de uma vez (set_axis) em vez de rodar regex e laços de detecção a
+# cada carga. Se um cabeçalho novo não tiver as colunas usadas nos joins, a carga
+# para com ErroEsquema (dizendo o que mudou) em vez de seguir com joins vazios.
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config import PASTA_CACHE
+
+ARQUIVO_ESQUEMAS = "esquemas.json"
+# impressões guardadas no arquivo (as mais antigas saem primeiro)
+MAXIMO_ESQUEMAS = 500
+
+COLUNAS_FIXAS_OFERTA = ["driver_id", "driver_name", "cluster", "vehicle_type", "no_show_time"]
+CANDIDATAS_DATA_CARREG = ["delivery_date", "date", "data_entrega", "task_date", "task_at_date"]
+
+
+class ErroEsquema(ValueError):
+    """Cabeçalho de aba sem as colunas de que o pipeline depende."""
+
+
+class Esquema(NamedTuple):
+    # tuplas: o mesmo Esquema é compartilhado por todas as cargas com o cabeçalho (não alterar)
+    colunas: Tuple[str, ...]        # nome canônico de cada coluna, na ordem do cabeçalho
+    datas: Tuple[str, ...]          # colunas de data (aba de oferta, larga)
+    telefone: Optional[str] = None  # nome normalizado da coluna de telefone encontrada, se houver
+
+    def selecionar(self, indices: List[int]) -> "Esquema":
+        """Esquema de uma sub-grade com só as colunas `indices` do cabeçalho (na ordem dada)."""
+        colunas = tuple(self.colunas[i] for i in indices)
+        datas = set(self.datas)
+        telefone = self.telefone if self.telefone in colunas else None
+        return Esquema(colunas, tuple(c for c in colunas if c in datas), telefone)
+
+
+# =====================================================
+# HEURÍSTICAS (rodam uma vez por cabeçalho)
+# =====================================================
+
+def normalizar_nome(nome) -> str:
+    """Cabeçalho em minúsculas, espaços trocados por "_" e sem outros símbolos."""
+    nome = str(nome).strip().lower().replace(" ", "_")
+    return re.sub(r"[^a-z0-9_]", "", nome)
+
+
+def detectar_coluna_telefone(cols: List[str]) -> Optional[str]:
+    """Procura nomes comuns para telefone e retorna o nome normalizado."""
+    cand = [c.lower().strip() for c in cols]
+    if "phone_number" in cand:
+        return cols[cand.index("phone_number")]
+    for opt in ("phone number", "phone", "telefone", "telefone_celular", "celular"):
+        if opt in cand:
+            return cols[cand.index(opt)]
+    # fallback: procura coluna que contenha 'phone' ou 'tel'
+    for i, c in enumerate(cand):
+        if "phone" in c or "tel" in c:
+            return cols[i]
+    return None
+
+
+def separar_colunas_oferta(colunas: List[str]) -> Tuple[List[str], List[str]]:
+    """(colunas fixas, colunas de data) a partir dos nomes já normalizados."""
+    # colunas fixas esperadas (ajustamos para o que existe realmente)
+    colunas_fixas = [c for c in COLUNAS_FIXAS_OFERTA if c in colunas]
+    colunas_datas = [c for c in colunas if c not in colunas_fixas]
+    return colunas_fixas, colunas_datas
+
+
+def _renomear(colunas: List[str], renomear: Dict[str, str]) -> List[str]:
+    """
+    Aplica `renomear` à lista. Uma coluna que já tinha o nome de destino sem ter
+    sido escolhida vira `<nome>_original`, para o DataFrame não ficar com nomes repetidos.
+    """
+    destinos = {d for o, d in renomear.items() if o != d}
+    return [
+        renomear[c] if c in renomear else (f"{c}_original" if c in destinos else c)
+        for c in colunas
+    ]
+
+
+def resolver_oferta(cabecalho: List[str]) -> Esquema:
+    colunas = [normalizar_nome(c) for c in cabecalho]
+    _, datas = separar_colunas_oferta(colunas)
+    return Esquema(tuple(colunas), tuple(datas))
+
+
+def resolver_carregamentos(cabecalho: List[str]) -> Esquema:
+    """driver_id / driver_name / delivery_date a partir dos nomes que a aba de carregamentos costuma ter."""
+    colunas = [normalizar_nome(c) for c in cabecalho]
+    renomear = {}
+    data = next((c for c in CANDIDATAS_DATA_CARREG if c in colunas), None)
+    if data:
+        renomear[data] = "delivery_date"
+    # vale a última coluna que casar, como na detecção original
+    driver_id = driver_name = None
+    for c in colunas:
+        if "driver_id" in c:
+            driver_id = c
+        if "driver_name" in c or "driver_nome" in c or c == "driver":
+            driver_name = c
+    if driver_id:
+        renomear[driver_id] = "driver_id"
+    if driver_name:
+        renomear[driver_name] = "driver_name"
+    return Esquema(tuple(_renomear(colunas, renomear)), ())
+
+
+def resolver_cadastro(cabecalho: List[str]) -> Esquema:
+    """Telefone -> phone_number; driver_id / driver_name pelo primeiro nome parecido, se faltarem."""
+    colunas = [normalizar_nome(c) for c in cabecalho]
+    renomear = {}
+    telefone = detectar_coluna_telefone(colunas)
+    if telefone and telefone != "phone_number":
+        renomear[telefone] = "phone_number"
+    if "driver_id" not in colunas:
+        cand = next((c for c in colunas if "driver" in c and "id" in c and c not in renomear), None)
+        if cand:
+            renomear[cand] = "driver_id"
+    if "driver_name" not in colunas:
+        cand = next((c for c in colunas if "driver" in c and ("name" in c or "nome" in c)), None)
+        if cand and cand not in renomear:
+            renomear[cand] = "driver_name"
+    return Esquema(tuple(_renomear(colunas, renomear)), (), telefone)
+
+
+# tipo -> (resolvedor, colunas obrigatórias depois de renomear).
+# "cadastro" vale para BASE_CADASTRO e SHEET_ATUALIZAR_CAD, na carga e nas escritas de contato.
+TIPOS: Dict[str, Tuple[Callable[[List[str]], Esquema], Tuple[str, ...]]] = {
+    "oferta": (resolver_oferta, ("driver_id", "driver_name")),
+    "carregamentos": (resolver_carregamentos, ("driver_id", "driver_name", "delivery_date")),
+    "cadastro": (resolver_cadastro, ("driver_id",)),
+}
+
+
+@lru_cache(maxsize=1)
+def versao_heuristicas() -> str:
+    """Muda junto com este arquivo: esquemas guardados por uma versão antiga são recalculados."""
+    return hashlib.sha1(Path(__file__).read_bytes()).hexdigest()[:12]
+
+
+def impressao_cabecalho(tipo: str, cabecalho: List[str]) -> str:
+    conteudo = json.dumps([tipo, versao_heuristicas(), cabecalho], ensure_ascii=False)
+    return hashlib.sha1(conteudo.encode("utf-8")).hexdigest()
+
+
+# =====================================================
+# REGISTRO
+# =====================================================
+
+class RegistroEsquemas:
+    """
+    Impressão do cabeçalho -> Esquema, em memória e (se houver `arquivo`) em disco.
+    Lembra também o último cabeçalho aceito de cada aba, para explicar o que mudou
+    quando um cabeçalho novo não serve.
+    """
+
+    def __init__(self, arquivo: Optional[Path] = None):
+        self.arquivo = Path(arquivo) if arquivo else None
+        self._lock = threading.Lock()
+        self._esquemas: Dict[str, Esquema] = {}
+        self._ultimos: Dict[str, List[str]] = {}
+        self.acertos = 0
+        self.resolvidos = 0
+        self._ler()
+
+    def obter(self, tipo: str, cabecalho: Iterable, aba: Optional[str] = None) -> Esquema:
+        cabecalho = [str(c) for c in cabecalho]
+        impressao = impressao_cabecalho(tipo, cabecalho)
+        with self._lock:
+            esquema = self._esquemas.get(impressao)
+            if esquema is not None:
+                self.acertos += 1
+                return esquema
+
+        resolver, obrigatorias = TIPOS[tipo]
+        esquema = resolver(cabecalho)
+        nome = aba or tipo
+        faltando = [c for c in obrigatorias if c not in esquema.colunas]
+        if cabecalho and faltando:
+            raise ErroEsquema(self._mensagem(nome, cabecalho, faltando))
+
+        with self._lock:
+            self.resolvidos += 1
+            self._esquemas[impressao] = esquema
+            if cabecalho:
+                self._ultimos[nome] = cabecalho
+            while len(self._esquemas) > MAXIMO_ESQUEMAS:
+                self._esquemas.pop(next(iter(self._esquemas)))
+            self._gravar()
+        return esquema
+
+    def _mensagem(self, nome: str, cabecalho: List[str], faltando: List[str]) -> str:
+        msg = f"Aba {nome}: cabeçalho sem as colunas {faltando} (recebido: {cabecalho})."
+        anterior = self._ultimos.get(nome)
+        if anterior is not None:
+            novas = [c for c in cabecalho if c not in anterior]
+            removidas = [c for c in anterior if c not in cabecalho]
+            msg += f" Desde o último cabeçalho válido: novas {novas}, removidas {removidas}."
+        return msg
+
+    # ---------- disco ----------
+    def _ler(self) -> None:
+        if self.arquivo is None or not self.arquivo.exists():
+            return
+        try:
+            dados = json.loads(self.arquivo.read_text(encoding="utf-8"))
+            self._esquemas = {
+                k: Esquema(tuple(v["colunas"]), tuple(v["datas"]), v.get("telefone"))
+                for k, v in dados.get("esquemas", {}).items()
+            }
+            self._ultimos = dados.get("ultimos", {})
+        except (OSError, ValueError, TypeError, KeyError):
+            # arquivo corrompido/antigo: recomeça do zero
+            self._esquemas, self._ultimos = {}, {}
+
+    def _gravar(self) -> None:
+        if self.arquivo is None:
+            return
+        dados = {
+            "esquemas": {k: e._asdict() for k, e in self._esquemas.items()},
+            "ultimos": self._ultimos,
+        }
+        try:
+            self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.arquivo.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(dados, f, ensure_ascii=False)
+            os.replace(tmp, self.arquivo)
+        except OSError:
+            pass  # sem disco o registro continua valendo em memória
+
+
+@lru_cache(maxsize=1)
+def registro_padrao() -> RegistroEsquemas:
+    return RegistroEsquemas(Path(PASTA_CACHE) / ARQUIVO_ESQUEMAS)
+
+
+def aplicar_esquema(df, tipo: str, aba: Optional[str] = None, registro: Optional[RegistroEsquemas] = None):
+    """(DataFrame com as colunas renomeadas de uma vez, Esquema)."""
+    esquema = (registro or registro_padrao()).obter(tipo, df.columns, aba)
+    return df.set_axis(esquema.colunas, axis=1), esquema
@@ -0,0 +1,65 @@
+# exportacao.py
+# Exportação do resumo filtrado em CSV compactado (gzip), Parquet e XLSX.
+# O app gera os bytes só quando o usuário clica em baixar (download_button com
+# função) e guarda o resultado por estado de filtro: rerun sem download não
+# serializa nada, e baixar de novo com os mesmos filtros reaproveita o arquivo.
+import io
+from typing import Callable, Dict, NamedTuple
+
+import pandas as pd
+
+from snapshot import para_arrow
+
+# linhas convertidas por vez ao escrever o XLSX (limita a cópia em object)
+BLOCO_XLSX = 10_000
+
+
+class Formato(NamedTuple):
+    rotulo: str
+    extensao: str
+    mime: str
+    gerar: Callable[[pd.DataFrame], bytes]
+
+
+def gerar_csv_gz(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False, encoding="utf-8", compression={"method": "gzip", "mtime": 0})
+    return buffer.getvalue()
+
+
+def gerar_parquet(df: pd.DataFrame) -> bytes:
+    # colunas com tipos misturados vão como texto, como nos snapshots
+    tabela, _ = para_arrow(df)
+    buffer = io.BytesIO()
+    tabela.to_parquet(buffer, index=False, compression="zstd")
+    return buffer.getvalue()
+
+
+def gerar_xlsx(df: pd.DataFrame) -> bytes:
+    """XLSX em modo write-only do openpyxl: as linhas são gravadas em sequência, sem montar a planilha em memória."""
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    aba = livro.create_sheet("resumo")
+    aba.append([str(c) for c in df.columns])
+    for inicio in range(0, len(df), BLOCO_XLSX):
+        bloco = df.iloc[inicio:inicio + BLOCO_XLSX].astype(object)
+        bloco = bloco.where(bloco.notna(), None)
+        for linha in bloco.itertuples(index=False, name=None):
+            aba.append(linha)
+    buffer = io.BytesIO()
+    livro.save(buffer)
+    return buffer.getvalue()
+
+
+FORMATOS: Dict[str, Formato] = {
+    "csv": Formato("CSV (gzip)", "csv.gz", "application/gzip", gerar_csv_gz),
+    "parquet": Formato("Parquet", "parquet", "application/vnd.apache.parquet", gerar_parquet),
+    "xlsx": Formato("Excel (XLSX)", "xlsx",
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", gerar_xlsx),
+}
+
+
+def exportar(df: pd.DataFrame, formato: str) -> bytes:
+    """Bytes do arquivo de `df` no formato pedido (uma das chaves de FORMATOS)."""
+    return FORMATOS[formato].gerar(df)
@@ -0,0 +1,126 @@
+# filtros.py
+# Índice dos filtros da sidebar, montado uma vez por carga de dados.
+# Cada interação com a sidebar reexecuta o app inteiro; com o índice, aplicar os
+# filtros vira interseção de vetores de posições já prontos, sem varrer as
+# colunas de texto a cada rerun. (A série diária vem do cubo, ver pipeline.montar_cubo.)
+import copy
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def posicoes_por_valor(serie: pd.Series) -> Dict[object, np.ndarray]:
+    """Valor -> posições (ordenadas) das linhas com esse valor; nulos ficam de fora."""
+    codigos, valores = pd.factorize(serie, sort=False)
+    ordem = np.argsort(codigos, kind="stable")
+    limites = np.searchsorted(codigos[ordem], np.arange(len(valores) + 1))
+    return {
+        valor: ordem[limites[i]:limites[i + 1]]
+        for i, valor in enumerate(valores)
+    }
+
+
+def _marcar(indice: Dict[object, np.ndarray], valores: Iterable, tamanho: int) -> np.ndarray:
+    """Máscara com as posições de todos os `valores` pedidos (as listas são disjuntas)."""
+    mascara = np.zeros(tamanho, dtype=bool)
+    for valor in valores:
+        if valor in indice:
+            mascara[indice[valor]] = True
+    return mascara
+
+
+class IndiceFiltros:
+    """
+    Posições do `resumo` por tipo de veículo e por cluster e ordem por aproveitamento.
+    A categoria depende das regras da sidebar: `indexar_categorias` refaz só essa parte.
+    """
+
+    def __init__(self, resumo: pd.DataFrame, df_clusters: pd.DataFrame):
+        self.n_resumo = len(resumo)
+        self.por_veiculo = posicoes_por_valor(resumo["vehicle_type"])
+        self.por_categoria: Dict[object, np.ndarray] = {}
+
+        # cluster -> posições no resumo (um driver_id pode ter mais de uma linha no resumo)
+        pos_resumo = pd.DataFrame({"driver_id": resumo["driver_id"].to_numpy(), "pos": np.arange(len(resumo))})
+        ligacao = df_clusters.astype({"cluster": object}).merge(pos_resumo, on="driver_id")
+        self.por_cluster = {
+            cluster: np.sort(grupo.to_numpy())
+            for cluster, grupo in ligacao.groupby("cluster", sort=False)["pos"]
+        }
+
+        # aproveitamento ordenado: "mínimo X%" vira um corte por busca binária
+        aprov = resumo["oferta_x_carregamento_%"].to_numpy(dtype=float)
+        self._ordem_aprov = np.argsort(aprov, kind="stable")
+        self._aprov_ordenado = aprov[self._ordem_aprov]
+
+    def indexar_categorias(self, categoria: pd.Series) -> None:
+        """(Re)indexa a categoria de cada linha do resumo, após aplicar as regras."""
+        self.por_categoria = posicoes_por_valor(categoria)
+
+    def com_categorias(self, categoria: pd.Series) -> "IndiceFiltros":
+        """Cópia rasa com a categoria indexada: o índice da carga, compartilhado entre sessões, fica intacto."""
+        indice = copy.copy(self)
+        indice.indexar_categorias(categoria)
+        return indice
+
+    def filtrar_resumo(
+        self,
+        categorias: Iterable,
+        veiculos: Iterable,
+        cluster: Optional[str] = None,
+        min_aprov: float = 0,
+    ) -> np.ndarray:
+        """Posições (ordenadas) das linhas do resumo que passam em todos os filtros."""
+        selecionadas = _marcar(self.por_categoria, categorias, self.n_resumo)
+        selecionadas &= _marcar(self.por_veiculo, veiculos, self.n_resumo)
+        if cluster is not None:
+            selecionadas &= _marcar(self.por_cluster, [cluster], self.n_resumo)
+
+        corte = np.searchsorted(self._aprov_ordenado, min_aprov, side="left")
+        acima = np.zeros(self.n_resumo, dtype=bool)
+        acima[self._ordem_aprov[corte:]] = True
+        return np.flatnonzero(selecionadas & acima)
+
+
+# =====================================================
+# TABELA DETALHADA PAGINADA (NO SERVIDOR)
+# =====================================================
+
+COLUNAS_BUSCA = ["driver_id", "driver_name", "phone_number"]
+
+
+def buscar(df: pd.DataFrame, busca: str = "", colunas: Iterable[str] = COLUNAS_BUSCA) -> np.ndarray:
+    """Posições das linhas que contêm `busca` (sem diferenciar maiúsculas) em alguma das `colunas`."""
+    termo = busca.strip().lower()
+    if not termo:
+        return np.arange(len(df))
+    achou = np.zeros(len(df), dtype=bool)
+    for col in colunas:
+        if col in df.columns:
+            achou |= df[col].astype(str).str.lower().str.contains(termo, regex=False).to_numpy()
+    return np.flatnonzero(achou)
+
+
+def paginar(
+    df: pd.DataFrame,
+    posicoes: np.ndarray,
+    ordenar_por: Optional[str] = None,
+    crescente: bool = True,
+    pagina: int = 1,
+    tamanho: int = 50,
+) -> pd.DataFrame:
+    """
+    Ordena as linhas `posicoes` de `df` e recorta a página pedida (1-based), no servidor:
+    só a página vai para o navegador.
+    """
+    if ordenar_por is not None and ordenar_por in df.columns and len(posicoes):
+        chaves = df[ordenar_por].iloc[posicoes].reset_index(drop=True)
+        ordem = chaves.sort_values(ascending=crescente, kind="stable", na_position="last").index
+        posicoes = posicoes[ordem.to_numpy()]
+    inicio = (max(int(pagina), 1) - 1) * tamanho
+    return df.iloc[posicoes[inicio:inicio + tamanho]]
+
+
+def total_paginas(linhas: int, tamanho: int) -> int:
+    return max(1, -(-linhas // tamanho))
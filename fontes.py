@@ -0,0 +1,282 @@
+# fontes.py
+# Camada de fontes de dados: Google Sheets (produção) ou arquivos locais
+# (CSV/JSON por aba) para testes, desenvolvimento offline e benchmark.
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+def conectar_google_sheets(service_account_file: str):
+    """Autentica a service account e devolve um cliente gspread."""
+    from google.oauth2.service_account import Credentials
+    import gspread
+
+    # Usamos escopo de spreadsheets completo para leitura/escrita (se necessário);
+    # drive.metadata.readonly permite consultar a data de modificação (revisão) da planilha
+    creds = Credentials.from_service_account_file(
+        service_account_file,
+        scopes=[
+            "https://www.googleapis.com/auth/spreadsheets",
+            "https://www.googleapis.com/auth/drive.metadata.readonly",
+        ]
+    )
+    return gspread.authorize(creds)
+
+
+def grade_para_registros(grade: List[List], numerico: bool = True) -> pd.DataFrame:
+    """
+    Converte uma grade bruta (cabeçalho + linhas, como no get_all_values) em
+    DataFrame de registros, com a mesma semântica do get_all_records: linhas
+    completadas até a largura do cabeçalho e células numéricas convertidas
+    (`numerico=False` mantém tudo como texto).
+    """
+    if not grade or not grade[0]:
+        return pd.DataFrame()
+    cabecalho = [str(h) for h in grade[0]]
+    largura = len(cabecalho)
+    linhas = [list(l[:largura]) + [""] * (largura - len(l)) for l in grade[1:]]
+    df = pd.DataFrame(linhas, columns=cabecalho, dtype=object)
+    if not numerico:
+        return df
+    for col in range(largura):
+        serie = df.iloc[:, col]
+        numeros = pd.to_numeric(serie, errors="coerce")
+        ok = numeros.notna()
+        if ok.all():
+            df.isetitem(col, numeros)
+        elif ok.any():
+            # coluna mista: converte célula a célula (int quando possível, como o gspread)
+            valores = serie.to_numpy(dtype=object).copy()
+            mascara = ok.to_numpy()
+            valores[mascara] = [converter_celula(v) for v in valores[mascara]]
+            df.isetitem(col, valores)
+    return df
+
+
+def impressao_grade(grade: List[List]) -> str:
+    """Impressão digital (sha1) do conteúdo de uma grade; muda se qualquer célula mudar."""
+    h = hashlib.sha1()
+    for linha in grade:
+        h.update("\x1f".join(map(str, linha)).encode("utf-8"))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+
+def converter_celula(valor: str):
+    """Número (int se possível) a partir do texto da célula; texto não numérico volta igual."""
+    try:
+        return int(valor)
+    except ValueError:
+        try:
+            return float(valor)
+        except ValueError:
+            return valor
+
+
+class FonteDados:
+    """Interface de uma fonte: cada aba é devolvida como DataFrame de registros."""
+
+    # identifica a fonte nas chaves de cache (planilha, pasta, ...)
+    identificador = "fonte"
+
+    def revisao(self) -> Optional[str]:
+        """Marca que muda sempre que os dados mudam; None se a fonte não sabe informar."""
+        return None
+
+    def ler_aba(self, aba: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def ler_abas(self, abas: List[str]) -> Dict[str, pd.DataFrame]:
+        return {aba: self.ler_aba(aba) for aba in abas}
+
+    def ler_grades(self, abas: List[str]) -> Dict[str, List[List[str]]]:
+        """Abas como grades de texto (cabeçalho + linhas), como no get_all_values."""
+        grades = {}
+        for aba, df in self.ler_abas(abas).items():
+            linhas = df.astype(str).where(df.notna(), "").values.tolist()
+            grades[aba] = [[str(c) for c in df.columns]] + linhas
+        return grades
+
+    def ler_cabecalho(self, aba: str) -> List[str]:
+        grade = self.ler_grades([aba])[aba]
+        return list(grade[0]) if grade else []
+
+    def ler_colunas(self, aba: str, indices: List[int]) -> Dict[int, List[str]]:
+        """Colunas inteiras (índice 0-based, cabeçalho na posição 0), todas com o mesmo tamanho."""
+        grade = self.ler_grades([aba])[aba]
+        return {i: [l[i] if i < len(l) else "" for l in grade] for i in indices}
+
+    def atualizar_celulas(self, aba: str, celulas: List[Tuple[int, int, object]]) -> None:
+        """Grava só as células indicadas: (linha, coluna, valor), 1-based como na planilha."""
+        raise NotImplementedError
+
+    def anexar_linhas(self, aba: str, linhas: List[List]) -> None:
+        """Acrescenta linhas ao final da aba."""
+        raise NotImplementedError
+
+
+class FonteGoogleSheets(FonteDados):
+    """
+    Lê as abas da planilha via gspread. A planilha é aberta uma única vez e
+    todas as abas pedidas vêm numa só chamada values:batchGet.
+    """
+
+    def __init__(self, cliente, sheet_id: str):
+        self.cliente = cliente
+        self.sheet_id = sheet_id
+        self.identificador = f"sheets:{sheet_id}"
+        self._planilha = None
+
+    @property
+    def planilha(self):
+        if self._planilha is None:
+            self._planilha = self.cliente.open_by_key(self.sheet_id)
+        return self._planilha
+
+    def revisao(self) -> Optional[str]:
+        # modifiedTime do Drive: uma chamada leve de metadados, sem baixar valores
+        return self.planilha.get_lastUpdateTime()
+
+    def ler_grades(self, abas: List[str]) -> Dict[str, List[List[str]]]:
+        from gspread.utils import absolute_range_name
+
+        resposta = self.planilha.values_batch_get([absolute_range_name(aba) for aba in abas])
+        intervalos = resposta.get("valueRanges", [])
+        return {aba: intervalo.get("values", []) for aba, intervalo in zip(abas, intervalos)}
+
+    def ler_abas(self, abas: List[str]) -> Dict[str, pd.DataFrame]:
+        return {aba: grade_para_registros(grade) for aba, grade in self.ler_grades(abas).items()}
+
+    def ler_aba(self, aba: str) -> pd.DataFrame:
+        return self.ler_abas([aba])[aba]
+
+    def ler_cabecalho(self, aba: str) -> List[str]:
+        from gspread.utils import absolute_range_name
+
+        resposta = self.planilha.values_batch_get([absolute_range_name(aba, "1:1")])
+        valores = resposta.get("valueRanges", [{}])[0].get("values", [])
+        return list(valores[0]) if valores else []
+
+    def ler_colunas(self, aba: str, indices: List[int]) -> Dict[int, List[str]]:
+        # só as colunas pedidas (ex.: 'SHEET_OFERTA'!F:F), todas na mesma chamada
+        from gspread.utils import absolute_range_name, rowcol_to_a1
+
+        if not indices:
+            return {}
+        letras = [rowcol_to_a1(1, i + 1)[:-1] for i in indices]
+        resposta = self.planilha.values_batch_get(
+            [absolute_range_name(aba, f"{l}:{l}") for l in letras],
+            params={"majorDimension": "COLUMNS"},
+        )
+        colunas = [
+            (intervalo.get("values") or [[]])[0]
+            for intervalo in resposta.get("valueRanges", [])
+        ]
+        # a API corta células vazias no fim de cada coluna
+        altura = max((len(c) for c in colunas), default=0)
+        return {i: list(c) + [""] * (altura - len(c)) for i, c in zip(indices, colunas)}
+
+    def atualizar_celulas(self, aba: str, celulas: List[Tuple[int, int, object]]) -> None:
+        # todas as células numa só chamada values:batchUpdate
+        from gspread.utils import absolute_range_name, rowcol_to_a1
+
+        if not celulas:
+            return
+        self.planilha.values_batch_update({
+            "valueInputOption": "RAW",
+            "data": [
+                {"range": absolute_range_name(aba, rowcol_to_a1(linha, coluna)), "values": [[valor]]}
+                for linha, coluna, valor in celulas
+            ],
+        })
+
+    def anexar_linhas(self, aba: str, linhas: List[List]) -> None:
+        # values:append insere depois da última linha com dados, sem sobrescrever
+        from gspread.utils import absolute_range_name
+
+        if not linhas:
+            return
+        self.planilha.values_append(
+            absolute_range_name(aba),
+            params={"valueInputOption": "RAW", "insertDataOption": "INSERT_ROWS"},
+            body={"values": linhas},
+        )
+
+
+class FonteLocal(FonteDados):
+    """
+    Lê cada aba de um arquivo `<pasta>/<ABA>.csv` ou `<pasta>/<ABA>.json`
+    (lista de registros). Células vazias viram "" como no get_all_records.
+    """
+
+    def __init__(self, pasta):
+        self.pasta = Path(pasta)
+        self.identificador = f"local:{self.pasta.resolve()}"
+
+    def revisao(self) -> Optional[str]:
+        arquivos = sorted(p for p in self.pasta.glob("*") if p.suffix in (".csv", ".json"))
+        if not arquivos:
+            return None
+        return ";".join(f"{p.name}:{p.stat().st_mtime_ns}" for p in arquivos)
+
+    def caminho(self, aba: str) -> Optional[Path]:
+        for ext in (".csv", ".json"):
+            p = self.pasta / f"{aba}{ext}"
+            if p.exists():
+                return p
+        return None
+
+    def ler_aba(self, aba: str) -> pd.DataFrame:
+        p = self.caminho(aba)
+        if p is None:
+            raise FileNotFoundError(f"Aba '{aba}' não encontrada em {self.pasta} (.csv/.json)")
+        if p.suffix == ".json":
+            with open(p, encoding="utf-8") as f:
+                return pd.DataFrame(json.load(f))
+        # CSV passa pela grade de texto para ter a mesma conversão do Google Sheets
+        return grade_para_registros(self.ler_grades([aba])[aba])
+
+    def ler_grades(self, abas: List[str]) -> Dict[str, List[List[str]]]:
+        grades = {}
+        for aba in abas:
+            p = self.caminho(aba)
+            if p is not None and p.suffix == ".csv":
+                df = pd.read_csv(p, dtype=str, keep_default_na=False)
+                grades[aba] = [list(df.columns)] + df.values.tolist()
+            else:
+                grades.update(super().ler_grades([aba]))
+        return grades
+
+    def _gravar_grade(self, aba: str, grade: List[List]) -> None:
+        p = self.caminho(aba)
+        if p is None or p.suffix != ".csv":
+            raise NotImplementedError(f"Escrita suportada só em CSV ({aba})")
+        largura = max(len(l) for l in grade)
+        linhas = [list(l) + [""] * (largura - len(l)) for l in grade]
+        pd.DataFrame(linhas[1:], columns=linhas[0]).to_csv(p, index=False)
+
+    def atualizar_celulas(self, aba: str, celulas: List[Tuple[int, int, object]]) -> None:
+        grade = self.ler_grades([aba])[aba]
+        for linha, coluna, valor in celulas:
+            while len(grade) < linha:
+                grade.append([])
+            alvo = grade[linha - 1]
+            alvo.extend([""] * (coluna - len(alvo)))
+            alvo[coluna - 1] = str(valor)
+        self._gravar_grade(aba, grade)
+
+    def anexar_linhas(self, aba: str, linhas: List[List]) -> None:
+        self._gravar_grade(aba, self.ler_grades([aba])[aba] + [list(l) for l in linhas])
+
+
+class FonteMemoria(FonteDados):
+    """Fonte com DataFrames já em memória (dados sintéticos, testes)."""
+
+    def __init__(self, abas: Dict[str, pd.DataFrame]):
+        self.abas = abas
+
+    def ler_aba(self, aba: str) -> pd.DataFrame:
+        return self.abas[aba].copy()
@@ -0,0 +1,111 @@
+# graficos.py
+# Figuras dos gráficos principais montadas a partir de dados já resumidos no
+# servidor: o histograma leva a contagem por categoria, o box leva os quartis e
+# as cercas de cada categoria e, acima de `limite` motoristas, a dispersão passa
+# a WebGL com os pontos agrupados por (dias ofertados, dias carregados, categoria).
+# Assim o tamanho da figura enviada ao navegador não cresce com o número de motoristas.
+from typing import List, Optional
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+CORES = px.colors.qualitative.Plotly
+
+
+def ordem_presente(serie: pd.Series, ordem: List[str]) -> List[str]:
+    """Categorias de `ordem` presentes na série, seguidas das demais (regras customizadas)."""
+    presentes = set(pd.unique(serie.dropna()))
+    return [c for c in ordem if c in presentes] + sorted(presentes - set(ordem), key=str)
+
+
+def contagem_por_categoria(df: pd.DataFrame, coluna: str, ordem: List[str]) -> pd.DataFrame:
+    """Uma linha por categoria: [coluna, motoristas]."""
+    contagem = df[coluna].astype(object).value_counts()
+    categorias = ordem_presente(df[coluna], ordem)
+    return pd.DataFrame({coluna: categorias, "motoristas": contagem.reindex(categorias).to_numpy()})
+
+
+def quartis_por_categoria(df: pd.DataFrame, x: str, y: str, ordem: List[str]) -> pd.DataFrame:
+    """
+    Estatísticas do box por categoria: q1, mediana, q3 e as cercas de Tukey
+    (menor/maior valor dentro de 1,5×IQR dos quartis), como o plotly calcularia.
+    """
+    dados = pd.DataFrame({x: df[x].astype(object), y: pd.to_numeric(df[y], errors="coerce")}).dropna()
+    grupos = dados.groupby(x, sort=False)[y]
+    stats = grupos.quantile([0.25, 0.5, 0.75]).unstack().reindex(columns=[0.25, 0.5, 0.75])
+    stats.columns = ["q1", "mediana", "q3"]
+
+    iqr = stats["q3"] - stats["q1"]
+    dados = dados.join((stats["q1"] - 1.5 * iqr).rename("_min"), on=x).join((stats["q3"] + 1.5 * iqr).rename("_max"), on=x)
+    dentro = dados[(dados[y] >= dados["_min"]) & (dados[y] <= dados["_max"])].groupby(x, sort=False)[y]
+    stats["cerca_inferior"] = dentro.min()
+    stats["cerca_superior"] = dentro.max()
+    stats["motoristas"] = grupos.size()
+
+    categorias = [c for c in ordem_presente(df[x], ordem) if c in stats.index]
+    return stats.reindex(categorias).rename_axis(x).reset_index()
+
+
+def figura_contagem(df: pd.DataFrame, coluna: str, ordem: List[str], titulo: str) -> go.Figure:
+    contagem = contagem_por_categoria(df, coluna, ordem)
+    return px.bar(
+        contagem, x=coluna, y="motoristas", color=coluna,
+        category_orders={coluna: list(contagem[coluna])},
+        color_discrete_sequence=CORES, title=titulo,
+    )
+
+
+def figura_box(df: pd.DataFrame, x: str, y: str, ordem: List[str], titulo: str) -> go.Figure:
+    """Box com os quartis pré-calculados (sem os pontos individuais)."""
+    stats = quartis_por_categoria(df, x, y, ordem)
+    fig = go.Figure()
+    for i, linha in enumerate(stats.itertuples(index=False)):
+        fig.add_trace(go.Box(
+            name=str(getattr(linha, x)), x=[getattr(linha, x)],
+            q1=[linha.q1], median=[linha.mediana], q3=[linha.q3],
+            lowerfence=[linha.cerca_inferior], upperfence=[linha.cerca_superior],
+            marker_color=CORES[i % len(CORES)], boxpoints=False,
+        ))
+    fig.update_layout(title=titulo, xaxis_title=x, yaxis_title=y, legend_title_text=x)
+    return fig
+
+
+def agrupar_dispersao(df: pd.DataFrame, x: str, y: str, cor: str, tamanho: str) -> pd.DataFrame:
+    """Um ponto por (x, y, cor): quantidade de motoristas e média de `tamanho`."""
+    return (
+        df.assign(**{cor: df[cor].astype(object)})
+        .groupby([x, y, cor], sort=False, dropna=False)
+        .agg(motoristas=(tamanho, "size"), **{tamanho: (tamanho, "mean")})
+        .reset_index()
+    )
+
+
+def figura_dispersao(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    cor: str,
+    tamanho: str,
+    hover: List[str],
+    ordem: List[str],
+    titulo: str,
+    limite: Optional[int] = None,
+) -> go.Figure:
+    """
+    Até `limite` linhas, um ponto SVG por motorista (com o hover completo).
+    Acima disso, pontos WebGL agrupados por (x, y, cor), com tamanho = motoristas no ponto.
+    """
+    categorias = {cor: ordem_presente(df[cor], ordem)}
+    if limite is None or len(df) <= limite:
+        return px.scatter(
+            df, x=x, y=y, color=cor, size=tamanho, hover_data=hover,
+            category_orders=categorias, color_discrete_sequence=CORES, title=titulo,
+        )
+    pontos = agrupar_dispersao(df, x, y, cor, tamanho)
+    pontos[tamanho] = pontos[tamanho].round(1)
+    return px.scatter(
+        pontos, x=x, y=y, color=cor, size="motoristas", hover_data=["motoristas", tamanho],
+        category_orders=categorias, color_discrete_sequence=CORES, render_mode="webgl",
+        title=f"{titulo} (agrupado: {len(df)} motoristas em {len(pontos)} pontos)",
+    )
@@ -0,0 +1,404 @@
+# incremental.py
+# Atualização incremental da SHEET_OFERTA. A aba ganha uma coluna de data por dia;
+# em vez de baixar e derreter a aba inteira a cada mudança, guardamos em disco:
+#   - as datas já ingeridas e uma impressão digital das colunas fixas (motoristas);
+#   - a tabela longa já classificada, um arquivo Feather por data;
+#   - o estado agregado por motorista (contagens e sequências) até a "janela de revisão".
+# Cada atualização busca só o cabeçalho, as colunas fixas, as datas novas e as últimas
+# `janela` datas (que ainda podem ser editadas na planilha), e estende o estado com elas.
+# Qualquer mudança estrutural (motorista novo, coluna fixa alterada, data removida ou
+# inserida no passado, código novo) cai na reconstrução completa.
+# Edições em datas já consolidadas não são vistas pela leitura parcial: por isso o
+# estado também é reconstruído quando fica mais velho que `reconstruir_apos` horas
+# ou quando pedido (`completo=True`, como faz o lote).
+#
+# O estado em disco é trocado de forma atômica: cada atualização grava uma geração
+# completa numa pasta temporária (as datas que não mudaram entram como hard link da
+# geração anterior), renomeia a pasta e só então aponta `atual.json` para ela com
+# os.replace. Dashboard e lote podem usar a mesma pasta ao mesmo tempo: quem lê vê
+# sempre uma geração inteira, e as gerações substituídas ficam RETENCAO_GERACOES
+# segundos em disco para quem ainda estiver lendo delas.
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import ABA_OFERTA, PASTA_CACHE
+from esquemas import COLUNAS_FIXAS_OFERTA, Esquema, registro_padrao
+from fontes import FonteDados, grade_para_registros, impressao_grade
+from pipeline import (
+    CHAVE_RESUMO, classificar_disponibilidade, converter_datas, preparar_oferta,
+)
+from snapshot import chave, de_arrow, ler_feather, para_arrow, versao_codigo
+
+ARQUIVO_ATUAL = "atual.json"
+# segundos que uma geração substituída (ou uma pasta temporária abandonada) fica em disco
+RETENCAO_GERACOES = 3600
+
+COLUNAS_ESTADO = [
+    "total_dias", "dias_disponivel",
+    "max_dias_sem_ofertar", "max_dias_ofertando",
+    "seq_atual_sem_ofertar", "seq_atual_ofertando",
+]
+
+
+# =====================================================
+# ESTADO POR MOTORISTA
+# =====================================================
+
+def estado_vazio() -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype="int64") for c in COLUNAS_ESTADO}).rename_axis("driver_id")
+
+
+def estender_estado(estado: pd.DataFrame, df_dias: pd.DataFrame) -> pd.DataFrame:
+    """
+    Acrescenta ao estado (indexado por driver_id) os dias de `df_dias`
+    (driver_id, data, disponivel), que devem ser posteriores aos já contados.
+    Percorre as datas novas em ordem, vetorizado sobre todos os motoristas:
+    custo proporcional a motoristas × datas novas.
+    """
+    cod, drivers = pd.factorize(df_dias["driver_id"])
+    ok = cod >= 0
+    if not ok.any():
+        return estado
+    datas, cod_data = np.unique(df_dias["data"].to_numpy()[ok], return_inverse=True)
+    disp = df_dias["disponivel"].to_numpy()[ok] > 0
+    cod = cod[ok]
+
+    # matriz motoristas × datas: -1 sem linha, 0 sem oferta, 1 ofertou (qualquer linha do dia)
+    matriz = np.full((len(drivers), len(datas)), -1, dtype=np.int8)
+    matriz[cod, cod_data] = 0
+    matriz[cod[disp], cod_data[disp]] = 1
+
+    # alinhar motoristas novos ao estado
+    pos = estado.index.get_indexer(drivers)
+    novos = drivers[pos < 0]
+    if len(novos):
+        estado = pd.concat([estado, pd.DataFrame(0, index=novos, columns=COLUNAS_ESTADO)])
+        pos = estado.index.get_indexer(drivers)
+    valores = {c: estado[c].to_numpy(dtype=np.int64).copy() for c in COLUNAS_ESTADO}
+    v = {c: valores[c][pos] for c in COLUNAS_ESTADO}
+
+    for j in range(len(datas)):
+        presente = matriz[:, j] >= 0
+        ofertou = matriz[:, j] == 1
+        faltou = presente & ~ofertou
+        v["total_dias"] += presente
+        v["dias_disponivel"] += ofertou
+        v["seq_atual_ofertando"] = np.where(ofertou, v["seq_atual_ofertando"] + 1, np.where(faltou, 0, v["seq_atual_ofertando"]))
+        v["seq_atual_sem_ofertar"] = np.where(faltou, v["seq_atual_sem_ofertar"] + 1, np.where(ofertou, 0, v["seq_atual_sem_ofertar"]))
+        v["max_dias_ofertando"] = np.maximum(v["max_dias_ofertando"], v["seq_atual_ofertando"])
+        v["max_dias_sem_ofertar"] = np.maximum(v["max_dias_sem_ofertar"], v["seq_atual_sem_ofertar"])
+
+    for c in COLUNAS_ESTADO:
+        valores[c][pos] = v[c]
+    return pd.DataFrame(valores, index=estado.index).rename_axis("driver_id")
+
+
+def agregados_do_estado(chaves: pd.DataFrame, estado: pd.DataFrame) -> pd.DataFrame:
+    """Agregados de oferta no formato de `pipeline.agregar_oferta` (uma linha por CHAVE_RESUMO)."""
+    agregados = chaves[CHAVE_RESUMO].drop_duplicates().merge(
+        estado.reset_index(), on="driver_id", how="left"
+    )
+    agregados[COLUNAS_ESTADO] = agregados[COLUNAS_ESTADO].fillna(0).astype(int)
+    return agregados
+
+
+# =====================================================
+# OFERTA INCREMENTAL
+# =====================================================
+
+class OfertaIncremental:
+    """Mantém a SHEET_OFERTA tratada em disco e a atualiza só com as colunas de data que mudaram."""
+
+    def __init__(self, fonte: FonteDados, pasta=PASTA_CACHE, janela: int = 2, aba: str = ABA_OFERTA,
+                 reconstruir_apos: float = 0, completo: bool = False):
+        self.fonte = fonte
+        self.aba = aba
+        self.janela = max(int(janela), 0)
+        # horas até a próxima releitura completa (0 = só em mudança estrutural)
+        self.reconstruir_apos = reconstruir_apos
+        # próxima atualização relê a aba inteira
+        self.completo = completo
+        self.pasta = Path(pasta) / "incremental" / chave(fonte.identificador, aba)
+        self.ultima_atualizacao: Dict = {}
+        # impressão digital do conteúdo após a última atualização (chave do cache de etapas)
+        self.impressao: Optional[str] = None
+
+    # ---------- persistência ----------
+    def _geracoes(self) -> Path:
+        return self.pasta / "geracoes"
+
+    def _ler_meta(self) -> Optional[Dict]:
+        """Meta da geração atual; None (reconstrução) se não houver, não der para ler ou for de outro código."""
+        try:
+            atual = json.loads((self.pasta / ARQUIVO_ATUAL).read_text(encoding="utf-8"))
+            meta = json.loads((self._geracoes() / atual["geracao"] / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if meta.get("versao") != versao_codigo() or meta.get("geracao") != atual["geracao"]:
+            return None
+        return meta
+
+    def _vencido(self, meta: Optional[Dict]) -> bool:
+        if self.completo or meta is None:
+            return True
+        if not self.reconstruir_apos:
+            return False
+        return time.time() - meta.get("reconstruido_em", 0) > self.reconstruir_apos * 3600
+
+    def reconstrucao_pendente(self) -> bool:
+        """
+        True se a próxima `atualizar` vai reler a aba inteira. Nesse caso um resultado
+        já salvo para a revisão atual pode ter vindo de um estado desatualizado
+        (snapshot.carregar_com_snapshot recalcula em vez de reaproveitá-lo).
+        """
+        return self._vencido(self._ler_meta())
+
+    def _pasta_geracao(self, meta: Dict) -> Path:
+        return self._geracoes() / meta["geracao"]
+
+    @staticmethod
+    def _arquivo_data(pasta: Path, coluna: str) -> Path:
+        return pasta / "long" / f"{coluna}.feather"
+
+    def _gravar_datas(self, pasta: Path, df_long: pd.DataFrame, colunas: Dict[pd.Timestamp, str], meta: Dict) -> None:
+        (pasta / "long").mkdir(parents=True, exist_ok=True)
+        for data, parte in df_long.groupby("data", sort=False):
+            coluna = colunas[data]
+            parte, mistas = para_arrow(parte)
+            meta["mistas"][coluna] = mistas
+            parte.to_feather(self._arquivo_data(pasta, coluna), compression="uncompressed")
+
+    def _copiar_datas(self, origem: Path, destino: Path, colunas: List[str]) -> None:
+        """Datas que não mudaram: hard link da geração anterior (cópia se o disco não permitir)."""
+        (destino / "long").mkdir(parents=True, exist_ok=True)
+        for coluna in colunas:
+            try:
+                os.link(self._arquivo_data(origem, coluna), self._arquivo_data(destino, coluna))
+            except OSError:
+                shutil.copy2(self._arquivo_data(origem, coluna), self._arquivo_data(destino, coluna))
+
+    def _ler_long(self, meta: Dict) -> pd.DataFrame:
+        pasta = self._pasta_geracao(meta)
+        partes = [
+            de_arrow(ler_feather(self._arquivo_data(pasta, c)), meta["mistas"].get(c, []))
+            for c in meta["datas"]
+        ]
+        if not partes:
+            return pd.DataFrame()
+        return pd.concat(partes, ignore_index=True)
+
+    def _gravar_estado(self, pasta: Path, estado: pd.DataFrame, meta: Dict) -> None:
+        df, mistas = para_arrow(estado.reset_index())
+        meta["mistas"]["__estado__"] = mistas
+        df.to_feather(pasta / "estado.feather", compression="uncompressed")
+
+    def _ler_estado(self, meta: Dict) -> pd.DataFrame:
+        df = de_arrow(
+            ler_feather(self._pasta_geracao(meta) / "estado.feather"), meta["mistas"].get("__estado__", [])
+        )
+        return df.set_index("driver_id")
+
+    @contextmanager
+    def _nova_geracao(self):
+        """Pasta temporária para montar a próxima geração (apagada se a gravação não chegar ao fim)."""
+        self._geracoes().mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=self._geracoes(), prefix=".tmp_"))
+        try:
+            yield tmp
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    def _publicar(self, tmp: Path, meta: Dict) -> None:
+        """Fecha a geração montada em `tmp` e passa a apontar para ela (os.replace do atual.json)."""
+        nome = tmp.name[len(".tmp_"):]
+        meta["geracao"] = nome
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self._geracoes() / nome)
+        fd, ponteiro = tempfile.mkstemp(dir=self.pasta, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"geracao": nome}, f)
+        substituida = self._ler_meta()
+        os.replace(ponteiro, self.pasta / ARQUIVO_ATUAL)
+        if substituida is not None:
+            # o mtime passa a marcar quando a geração deixou de ser a atual (ver _limpar)
+            try:
+                os.utime(self._pasta_geracao(substituida))
+            except OSError:
+                pass
+        self._limpar(nome)
+
+    def _limpar(self, atual: str) -> None:
+        """Apaga gerações substituídas e pastas temporárias com mais de RETENCAO_GERACOES segundos."""
+        limite = time.time() - RETENCAO_GERACOES
+        for p in self._geracoes().iterdir():
+            try:
+                if p.name != atual and p.is_dir() and p.stat().st_mtime < limite:
+                    shutil.rmtree(p, ignore_errors=True)
+            except OSError:
+                pass  # apagada por outro processo
+        # estado no formato antigo (gravado direto na pasta, sem gerações)
+        for antigo in ("long", "meta.json", "estado.feather"):
+            alvo = self.pasta / antigo
+            if alvo.is_dir():
+                shutil.rmtree(alvo, ignore_errors=True)
+            elif alvo.exists():
+                alvo.unlink(missing_ok=True)
+        # arquivos do formato antigo (estado gravado direto na pasta)
+        for antigo in ("long", "meta.json", "estado.feather"):
+            alvo = self.pasta / antigo
+            if alvo.is_dir():
+                shutil.rmtree(alvo, ignore_errors=True)
+            elif alvo.exists():
+                alvo.unlink()
+
+    # ---------- leitura da planilha ----------
+    def _estrutura(self, cabecalho: List[str]):
+        """
+        Esquema do cabeçalho completo, índices das colunas fixas e colunas de data
+        (nome normalizado -> (índice, data)).
+        """
+        # o mesmo esquema (do registro) que preparar_oferta usa; cabeçalho inválido levanta ErroEsquema
+        esquema = registro_padrao().obter("oferta", cabecalho, self.aba)
+        normalizados = esquema.colunas
+        fixas, candidatas = [c for c in COLUNAS_FIXAS_OFERTA if c in normalizados], esquema.datas
+        idx_fixas = [normalizados.index(c) for c in fixas]
+        # mesma conversão dos cabeçalhos que preparar_oferta faz antes do melt
+        convertidas = converter_datas(candidatas)
+        datas = {}
+        for c, data in zip(candidatas, convertidas):
+            if pd.notna(data) and c not in datas:
+                datas[c] = (normalizados.index(c), data)
+        return esquema, idx_fixas, datas
+
+    @staticmethod
+    def _tratar(cabecalho: List[str], esquema: Esquema, colunas: Dict[int, List[str]]) -> pd.DataFrame:
+        """
+        Monta a sub-grade (fixas + datas buscadas), derrete e classifica. Usa o esquema
+        do cabeçalho completo: a sub-grade não passa pelo registro (não vira uma impressão nova).
+        """
+        indices = list(colunas)
+        altura = len(next(iter(colunas.values()))) if colunas else 0
+        grade = [[cabecalho[i] for i in indices]] + [
+            [colunas[i][r] for i in indices] for r in range(1, altura)
+        ]
+        return classificar_disponibilidade(
+            preparar_oferta(grade_para_registros(grade), esquema.selecionar(indices))
+        )
+
+    @staticmethod
+    def _impressao(colunas: Dict[int, List[str]], idx_fixas: List[int]) -> str:
+        h = hashlib.sha1()
+        for i in idx_fixas:
+            valores = list(map(str, colunas[i]))
+            while valores and valores[-1] == "":
+                valores.pop()
+            h.update("\x1f".join(valores).encode("utf-8"))
+            h.update(b"\x1e")
+        return h.hexdigest()
+
+    # ---------- atualização ----------
+    def atualizar(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Devolve (df_long classificado, agregados de oferta), prontos para
+        `pipeline.processar(..., oferta=...)`.
+        """
+        cabecalho = self.fonte.ler_cabecalho(self.aba)
+        esquema, idx_fixas, datas = self._estrutura(cabecalho)
+        meta = self._ler_meta()
+
+        ordem = sorted(datas, key=lambda c: datas[c][1])
+        if self._vencido(meta) or meta["cabecalho_fixas"] != [cabecalho[i] for i in idx_fixas]:
+            return self._reconstruir(cabecalho, esquema, idx_fixas, datas, ordem)
+
+        ingeridas = meta["datas"]
+        if any(c not in datas for c in ingeridas):
+            return self._reconstruir(cabecalho, esquema, idx_fixas, datas, ordem)
+        novas = [c for c in ordem if c not in ingeridas]
+        janela_antiga = meta["janela"]
+        estaveis = [c for c in ingeridas if c not in janela_antiga]
+        ultima = max((datas[c][1] for c in ingeridas), default=None)
+        if ultima is not None and any(datas[c][1] <= ultima for c in novas):
+            # data inserida no passado (mesmo entre as datas da janela): as sequências
+            # só podem ser estendidas em ordem de data, então recomeça do zero
+            return self._reconstruir(cabecalho, esquema, idx_fixas, datas, ordem)
+
+        buscar = janela_antiga + novas
+        colunas = self.fonte.ler_colunas(self.aba, idx_fixas + [datas[c][0] for c in buscar])
+        if self._impressao(colunas, idx_fixas) != meta["impressao_fixas"]:
+            return self._reconstruir(cabecalho, esquema, idx_fixas, datas, ordem)
+
+        df_novo = self._tratar(cabecalho, esquema, colunas)
+        anterior = self._pasta_geracao(meta)
+
+        # datas que saem da janela viram estado consolidado
+        todas = sorted(estaveis + buscar, key=lambda c: datas[c][1])
+        janela = todas[-self.janela:] if self.janela else []
+        consolidar = [c for c in buscar if c not in janela]
+        estado = self._ler_estado(meta)
+        datas_consolidar = [datas[c][1] for c in consolidar]
+        estado = estender_estado(estado, df_novo[df_novo["data"].isin(datas_consolidar)])
+
+        indice = {c: datas[c][0] for c in buscar}
+        if consolidar:
+            meta["impressao_estavel"] = impressao_grade(
+                [[meta["impressao_estavel"]]] + [colunas[indice[c]] for c in consolidar]
+            )
+        meta.update(datas=todas, janela=janela)
+        with self._nova_geracao() as tmp:
+            self._copiar_datas(anterior, tmp, estaveis)
+            self._gravar_datas(tmp, df_novo, {datas[c][1]: c for c in buscar}, meta)
+            self._gravar_estado(tmp, estado, meta)
+            self._publicar(tmp, meta)
+        self.impressao = impressao_grade(
+            [[meta["impressao_fixas"], meta["impressao_estavel"]], todas] + [colunas[indice[c]] for c in janela]
+        )
+        self.ultima_atualizacao = {"modo": "incremental", "datas_buscadas": buscar, "datas_novas": novas}
+
+        df_long = self._ler_long(meta)
+        final = estender_estado(estado, df_novo[df_novo["data"].isin([datas[c][1] for c in janela])])
+        return df_long, agregados_do_estado(df_novo if len(df_novo) else df_long, final)
+
+    def _reconstruir(self, cabecalho, esquema, idx_fixas, datas, ordem) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Leitura completa da aba (primeira vez ou mudança estrutural)."""
+        colunas = self.fonte.ler_colunas(self.aba, idx_fixas + [datas[c][0] for c in ordem])
+        df_long = self._tratar(cabecalho, esquema, colunas)
+
+        janela = ordem[-self.janela:] if self.janela else []
+        datas_janela = [datas[c][1] for c in janela]
+        estado = estender_estado(estado_vazio(), df_long[~df_long["data"].isin(datas_janela)])
+
+        meta = {
+            "versao": versao_codigo(),
+            "reconstruido_em": time.time(),
+            "cabecalho_fixas": [cabecalho[i] for i in idx_fixas],
+            "impressao_fixas": self._impressao(colunas, idx_fixas),
+            "impressao_estavel": impressao_grade(
+                [[""]] + [colunas[datas[c][0]] for c in ordem if c not in janela]
+            ),
+            "datas": ordem,
+            "janela": janela,
+            "mistas": {},
+        }
+        with self._nova_geracao() as tmp:
+            self._gravar_datas(tmp, df_long, {datas[c][1]: c for c in ordem}, meta)
+            self._gravar_estado(tmp, estado, meta)
+            self._publicar(tmp, meta)
+        self.impressao = impressao_grade(
+            [[meta["impressao_fixas"], meta["impressao_estavel"]], ordem] + [colunas[datas[c][0]] for c in janela]
+        )
+        self.ultima_atualizacao = {"modo": "completo", "datas_buscadas": ordem, "datas_novas": ordem}
+        self.completo = False
+
+        final = estender_estado(estado, df_long[df_long["data"].isin(datas_janela)])
+        return df_long, agregados_do_estado(df_long, final)
@@ -0,0 +1,150 @@
+# lote.py
+# Execução sem Streamlit: calcula o resumo dos motoristas a partir da fonte
+# (Google Sheets ou pasta local) e grava os resultados em disco, inteiros e
+# por cluster. O resultado também fica no snapshot em PASTA_CACHE: rodando o
+# lote de madrugada (cron) com a mesma pasta de cache, o dashboard só lê do disco.
+# Por padrão o lote relê a SHEET_OFERTA inteira e reconstrói o estado incremental
+# do dashboard (edições em datas antigas, fora da janela de revisão, entram aí).
+#
+# Uso:
+#   python lote.py --saida resultados                        # Google Sheets, Parquet
+#   python lote.py --fonte-local fixtures --formato csv --long
+#   python lote.py --sem-clusters --regras regras_categoria.json
+#   python lote.py --incremental                              # só datas novas + janela
+import argparse
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from config import (
+    ABAS, ARQUIVO_LOG_DIAGNOSTICO, ENV_FONTE_LOCAL, INCREMENTAL_OFERTA, JANELA_REVISAO, PASTA_CACHE,
+    RECONSTRUCAO_OFERTA_HORAS,
+    SERVICE_ACCOUNT_FILE, SHEET_ID, SHEETS_ESCRITAS_POR_MINUTO, SHEETS_LEITURAS_POR_MINUTO,
+)
+from cliente_sheets import ClienteComCota
+from diagnostico import Instrumentacao, configurar_log
+from exportacao import FORMATOS, exportar
+from filtros import IndiceFiltros
+from fontes import FonteDados, FonteGoogleSheets, FonteLocal, conectar_google_sheets
+from incremental import OfertaIncremental
+from pipeline import CacheEtapas, _sem_medicao
+from regras import aplicar_categorias, carregar_regras
+from snapshot import CacheSnapshot, carregar_com_snapshot
+
+
+def abrir_fonte(pasta_local: Optional[str] = None) -> FonteDados:
+    """Pasta local (CSV/JSON por aba), se informada; senão a planilha, com controle de cota."""
+    if pasta_local:
+        return FonteLocal(pasta_local)
+    cliente = ClienteComCota(
+        conectar_google_sheets(SERVICE_ACCOUNT_FILE),
+        leituras_por_minuto=SHEETS_LEITURAS_POR_MINUTO,
+        escritas_por_minuto=SHEETS_ESCRITAS_POR_MINUTO,
+    )
+    return FonteGoogleSheets(cliente, SHEET_ID)
+
+
+def calcular(
+    fonte: FonteDados,
+    cache: Optional[CacheSnapshot] = None,
+    incremental: bool = INCREMENTAL_OFERTA,
+    cache_etapas: Optional[CacheEtapas] = None,
+    medir=_sem_medicao,
+    completo: bool = False,
+):
+    """
+    Resultado de `processar` para a fonte, pelo mesmo caminho do dashboard (snapshot + incremental).
+    Com `completo`, a SHEET_OFERTA é relida inteira e o estado incremental reconstruído.
+    `medir(etapa)` cronometra cada passo (ver diagnostico.Instrumentacao).
+    """
+    cache = cache or CacheSnapshot()
+    oferta = OfertaIncremental(
+        fonte, cache.pasta, JANELA_REVISAO, reconstruir_apos=RECONSTRUCAO_OFERTA_HORAS, completo=completo,
+    ) if incremental else None
+    with medir("carga_total"):
+        return carregar_com_snapshot(fonte, cache, ABAS, oferta, cache_etapas, medir=medir)
+
+
+def nome_arquivo(valor) -> str:
+    """Nome seguro para arquivo/pasta a partir do nome de um cluster."""
+    nome = re.sub(r"[^\w.-]+", "_", str(valor).strip()).strip("._")
+    return nome or "sem_cluster"
+
+
+def gravar(df: pd.DataFrame, destino: Path, formato: str) -> Path:
+    caminho = destino.with_name(f"{destino.name}.{FORMATOS[formato].extensao}")
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_bytes(exportar(df, formato))
+    return caminho
+
+
+def gravar_resultados(
+    resumo: pd.DataFrame,
+    df_long: pd.DataFrame,
+    df_clusters: pd.DataFrame,
+    saida,
+    formato: str = "parquet",
+    por_cluster: bool = True,
+    incluir_long: bool = False,
+) -> List[Path]:
+    """
+    Grava `resumo` (e `df_long`, se pedido) em `saida/` e, com `por_cluster`,
+    uma cópia filtrada em `saida/clusters/<cluster>/` para cada cluster.
+    """
+    saida = Path(saida)
+    frames: Dict[str, pd.DataFrame] = {"resumo": resumo}
+    if incluir_long:
+        frames["df_long"] = df_long
+    gravados = [gravar(df, saida / nome, formato) for nome, df in frames.items()]
+
+    if por_cluster:
+        indice = IndiceFiltros(resumo, df_clusters)
+        for cluster, posicoes in indice.por_cluster.items():
+            pasta = saida / "clusters" / nome_arquivo(cluster)
+            gravados.append(gravar(resumo.iloc[posicoes], pasta / "resumo", formato))
+            if incluir_long:
+                ids = df_clusters.loc[df_clusters["cluster"] == cluster, "driver_id"]
+                gravados.append(gravar(df_long[df_long["driver_id"].isin(ids)], pasta / "df_long", formato))
+    return gravados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula o resumo dos motoristas sem o dashboard.")
+    parser.add_argument("--fonte-local", help=f"pasta com CSV/JSON por aba (padrão: ${ENV_FONTE_LOCAL} ou Google Sheets)")
+    parser.add_argument("--cache", default=PASTA_CACHE, help="pasta dos snapshots (a mesma do dashboard)")
+    parser.add_argument("--saida", default="resultados")
+    parser.add_argument("--formato", choices=list(FORMATOS), default="parquet")
+    parser.add_argument("--regras", help="JSON com as regras de categoria (padrão: as do dashboard)")
+    parser.add_argument("--long", action="store_true", help="grava também o df_long (disponibilidade diária)")
+    parser.add_argument("--sem-clusters", action="store_true", help="não grava os arquivos por cluster")
+    parser.add_argument("--incremental", action="store_true",
+                        help="lê só as datas novas e a janela de revisão (padrão: SHEET_OFERTA inteira)")
+    parser.add_argument("--log-json", default=ARQUIVO_LOG_DIAGNOSTICO,
+                        help='log JSON do tempo/linhas de cada etapa ("-" = stderr)')
+    args = parser.parse_args(argv)
+    configurar_log(args.log_json)
+    instrumentacao = Instrumentacao()
+
+    fonte = abrir_fonte(args.fonte_local or os.environ.get(ENV_FONTE_LOCAL))
+    inicio = time.perf_counter()
+    resumo, df_long, _, _, df_clusters, _, _ = calcular(
+        fonte, CacheSnapshot(args.cache), incremental=INCREMENTAL_OFERTA,
+        completo=not args.incremental, medir=instrumentacao.medir("carga"),
+    )
+    resumo = aplicar_categorias(resumo, carregar_regras(args.regras))
+    with instrumentacao("gravar_resultados", grupo="lote") as registro:
+        gravados = gravar_resultados(
+            resumo, df_long, df_clusters, args.saida, args.formato,
+            por_cluster=not args.sem_clusters, incluir_long=args.long,
+        )
+        registro["arquivos"] = len(gravados)
+    print(f"✅ {len(resumo)} motoristas em {time.perf_counter() - inicio:.1f}s; "
+          f"{len(gravados)} arquivo(s) gravado(s) em {args.saida}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,625 @@
+# pipeline.py
+# Tratamento dos dados do dashboard, sem dependência do Streamlit.
+# Cada etapa é uma função pura; `processar` encadeia todas a partir das abas brutas.
+import hashlib
+import re
+import threading
+from collections import Counter
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pandas.tseries.api import guess_datetime_format
+
+from config import ABA_OFERTA, ABA_CARREG, ABA_CADASTRO, ABA_ATUALIZAR
+from diagnostico import anotar_linhas
+from esquemas import COLUNAS_FIXAS_OFERTA, Esquema, aplicar_esquema
+from fontes import grade_para_registros, impressao_grade
+from regras import calcular_rate_por_7dias, classificar_motoristas
+
+# =====================================================
+# UTILIDADES
+# =====================================================
+
+def formato_datas(valores) -> Optional[str]:
+    """
+    Formato (strftime) aprendido do primeiro valor preenchido, como o pd.to_datetime
+    faz sozinho; None se não for texto ou se o formato não puder ser deduzido.
+    """
+    primeiro = next((v for v in valores if not (pd.isna(v) or v == "")), None)
+    if not isinstance(primeiro, str):
+        return None
+    return guess_datetime_format(primeiro)
+
+def converter_datas(valores, formato: Optional[str] = None) -> pd.DatetimeIndex:
+    """
+    Mesmo resultado de `pd.to_datetime(valores, errors="coerce")`, convertendo cada
+    valor distinto uma vez só: o formato (explícito ou aprendido com `formato_datas`)
+    é aplicado aos valores únicos e o resultado é espalhado pelos códigos do factorize.
+    O custo acompanha o número de datas distintas, não o de linhas.
+    """
+    if not isinstance(valores, (pd.Series, pd.Index, np.ndarray)):
+        valores = np.asarray(valores, dtype=object)
+    codigos, unicos = pd.factorize(valores, use_na_sentinel=True)
+    unicos = pd.Index(np.asarray(unicos, dtype=object), dtype=object)
+    convertidos = pd.to_datetime(unicos, errors="coerce", format=formato or formato_datas(unicos))
+    return convertidos.take(codigos, allow_fill=True, fill_value=pd.NaT)
+
+# =====================================================
+# SHEET_OFERTA
+# =====================================================
+
+def preparar_oferta(dados_oferta: pd.DataFrame, esquema: Optional[Esquema] = None) -> pd.DataFrame:
+    """
+    Normaliza a aba de oferta (larga, uma coluna por data) e derrete em formato longo.
+    `esquema` já resolvido (ex.: sub-grade da carga incremental) dispensa a consulta ao registro.
+    """
+    # nomes canônicos e colunas de data vêm do registro de esquemas (resolvidos uma vez por cabeçalho)
+    if esquema is None:
+        df_oferta, esquema = aplicar_esquema(dados_oferta, "oferta", ABA_OFERTA)
+    else:
+        df_oferta = dados_oferta.set_axis(esquema.colunas, axis=1)
+    colunas_fixas = [c for c in COLUNAS_FIXAS_OFERTA if c in esquema.colunas]
+
+    # cabeçalhos de data convertidos uma vez, antes do melt; colunas que não são data ficam de fora
+    convertidas = converter_datas(esquema.datas)
+    validas = convertidas.notna()
+    colunas_datas = [c for c, ok in zip(esquema.datas, validas) if ok]
+
+    # evitar naming collision no melt
+    value_col_name = "status"
+    i = 1
+    while value_col_name in df_oferta.columns:
+        value_col_name = f"status_{i}"
+        i += 1
+
+    df_long = df_oferta.melt(
+        id_vars=colunas_fixas,
+        value_vars=colunas_datas,
+        var_name="data",
+        value_name=value_col_name
+    )
+    # renomear para 'status' internamente
+    df_long = df_long.rename(columns={value_col_name: "status"})
+
+    # o melt empilha uma coluna de data por vez (len(df_oferta) linhas cada), na ordem de value_vars
+    df_long["data"] = np.repeat(convertidas[validas].to_numpy(), len(df_oferta))
+    return df_long
+
+# Disponibilidade e turno
+HORARIO_AM = "05:15-09:00"
+HORARIO_PM1 = "11:45-14:30"
+TURNOS = ["AM", "PM1", "AM|PM1", "Outro", "Sem Oferta"]
+STATUS_SEM_OFERTA = ["", "--", "Not Available"]
+RE_HORARIO = r"\d{2}:\d{2}-\d{2}:\d{2}"
+
+def verificar_disponibilidade_e_turno(valor):
+    """Regra de referência para uma célula; `classificar_status` aplica a mesma regra vetorizada."""
+    if pd.isna(valor) or str(valor).strip() in STATUS_SEM_OFERTA:
+        return 0, "Sem Oferta"
+    texto = str(valor)
+    # aceita se aparece o horário (string exata)
+    has_am = HORARIO_AM in texto
+    has_pm1 = HORARIO_PM1 in texto
+    # um mesmo campo pode conter ambos; vamos tratar em flags separadas:
+    if has_am and has_pm1:
+        # caso o status contenha ambos, retornamos Disponível e marcar como "AM|PM1"
+        return 1, "AM|PM1"
+    if has_am:
+        return 1, "AM"
+    if has_pm1:
+        return 1, "PM1"
+    # else: se contém algum horário diferente mas regex tem, considerar disponivel
+    if re.search(RE_HORARIO, texto):
+        return 1, "Outro"
+    return 0, "Sem Oferta"
+
+def classificar_status(status: pd.Series) -> Tuple[np.ndarray, pd.Categorical]:
+    """
+    Classifica uma coluna inteira de status de uma vez.
+    A regra roda só sobre os valores distintos (poucas dezenas mesmo com
+    milhões de células) e o resultado é espalhado pelos códigos do factorize.
+    Retorna (`disponivel` int8, `turno` categórico em TURNOS).
+    """
+    codigos, valores = pd.factorize(status, use_na_sentinel=True)
+    texto = pd.Series(np.asarray(valores, dtype=object), dtype=object).astype(str)
+
+    sem_oferta = texto.str.strip().isin(STATUS_SEM_OFERTA).to_numpy()
+    has_am = texto.str.contains(HORARIO_AM, regex=False).to_numpy()
+    has_pm1 = texto.str.contains(HORARIO_PM1, regex=False).to_numpy()
+    outro = texto.str.contains(RE_HORARIO, regex=True).to_numpy()
+
+    cod_sem_oferta = TURNOS.index("Sem Oferta")
+    turno_valores = np.select(
+        [sem_oferta, has_am & has_pm1, has_am, has_pm1, outro],
+        [cod_sem_oferta, TURNOS.index("AM|PM1"), TURNOS.index("AM"), TURNOS.index("PM1"), TURNOS.index("Outro")],
+        default=cod_sem_oferta,
+    ).astype(np.int8)
+    # posição extra no fim para os nulos (código -1 do factorize)
+    turno_valores = np.append(turno_valores, np.int8(cod_sem_oferta))
+    idx = np.where(codigos < 0, len(valores), codigos)
+
+    turno_cod = turno_valores[idx]
+    disponivel = (turno_cod != cod_sem_oferta).astype(np.int8)
+    turno = pd.Categorical.from_codes(turno_cod, categories=TURNOS)
+    return disponivel, turno
+
+def classificar_disponibilidade(df_long: pd.DataFrame) -> pd.DataFrame:
+    """Cria as colunas `disponivel` (int8) e `turno` (categórico) a partir do texto de `status`."""
+    df_long = df_long.copy()
+    disponivel, turno = classificar_status(df_long["status"])
+    df_long["disponivel"] = disponivel
+    df_long["turno"] = turno
+    return df_long
+
+def montar_clusters(df_long: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tabela-ponte driver_id -> cluster (uma linha por par), usada no filtro por cluster.
+    Substitui o explode de df_long por cluster: df_long continua com uma linha por
+    motorista-dia e a associação fica guardada uma única vez.
+    O texto de cluster ("01. NORTE, 02. SUL") só é quebrado para os valores distintos.
+    """
+    if "cluster" not in df_long.columns:
+        return pd.DataFrame({"driver_id": pd.Series(dtype=object), "cluster": pd.Categorical([])})
+
+    pares = df_long[["driver_id", "cluster"]].drop_duplicates()
+    codigos, valores = pd.factorize(pares["cluster"], use_na_sentinel=False)
+    nomes = pd.Series([str(v) for v in valores], dtype=object).str.split(",").explode()
+    # limpar espaços e prefixos numéricos "01. NOME"
+    nomes = nomes.str.strip().str.replace(r"^\d+\.\s*", "", regex=True)
+
+    ponte = pd.DataFrame({"driver_id": pares["driver_id"].to_numpy(), "codigo": codigos}).merge(
+        pd.DataFrame({"codigo": nomes.index.to_numpy(), "cluster": nomes.to_numpy()}), on="codigo"
+    )
+    ponte = ponte.drop(columns="codigo").drop_duplicates(ignore_index=True)
+    ponte["cluster"] = ponte["cluster"].astype("category")
+    return ponte
+
+# =====================================================
+# CUBO DATA × CLUSTER × TURNO
+# =====================================================
+
+def montar_cubo(df_long: pd.DataFrame, df_clusters: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pré-agregação de df_long por data, cluster e turno: `linhas` (motorista-dias) e
+    `disponivel` (soma). A média diária de disponibilidade de qualquer combinação de
+    filtros sai de somas sobre o cubo, sem reagrupar df_long a cada interação.
+    `cluster` nulo é a fatia de todos os motoristas (cada um contado uma vez).
+    """
+    colunas = ["data", "cluster", "turno", "linhas", "disponivel"]
+    if df_long.empty:
+        return pd.DataFrame(columns=colunas)
+
+    cod_data, datas = pd.factorize(df_long["data"], sort=True)
+    turno = pd.Categorical(df_long["turno"], categories=TURNOS)
+    n_turnos = len(TURNOS)
+    valido = (cod_data >= 0) & (turno.codes >= 0)
+    celula = (cod_data * n_turnos + turno.codes)[valido]
+    disponivel = df_long["disponivel"].to_numpy()[valido].astype(np.int64)
+    tamanho = len(datas) * n_turnos
+
+    # motorista de cada linha, para as fatias por cluster
+    cod_driver, drivers = pd.factorize(df_long["driver_id"])
+    cod_driver = cod_driver[valido]
+
+    fatias = []
+    clusters = df_clusters.astype({"cluster": object}).groupby("cluster", sort=True)["driver_id"]
+    for cluster, membros in [(None, None)] + list(clusters):
+        if membros is None:
+            selecao = slice(None)
+        else:
+            no_cluster = np.append(drivers.isin(membros.to_numpy()), False)  # código -1 -> fora
+            selecao = no_cluster[cod_driver]
+        linhas = np.bincount(celula[selecao], minlength=tamanho)
+        soma = np.bincount(celula[selecao], weights=disponivel[selecao], minlength=tamanho)
+        ocupadas = np.flatnonzero(linhas)
+        fatias.append(pd.DataFrame({
+            "data": datas[ocupadas // n_turnos],
+            "cluster": cluster,
+            "turno": pd.Categorical.from_codes(ocupadas % n_turnos, categories=TURNOS),
+            "linhas": linhas[ocupadas],
+            "disponivel": soma[ocupadas].astype(np.int64),
+        }))
+
+    cubo = pd.concat(fatias, ignore_index=True)
+    cubo["cluster"] = cubo["cluster"].astype("category")
+    return cubo
+
+def consultar_evolucao(cubo: pd.DataFrame, turnos: List[str], cluster: Optional[str] = None) -> pd.DataFrame:
+    """Disponibilidade média por data (como df_long filtrado agrupado por data) a partir do cubo."""
+    fatia = cubo["cluster"].isna() if cluster is None else cubo["cluster"] == cluster
+    selecao = cubo[fatia.to_numpy() & cubo["turno"].isin(turnos).to_numpy()]
+    somas = selecao.groupby("data", sort=True)[["linhas", "disponivel"]].sum()
+    return pd.DataFrame({
+        "data": somas.index,
+        "disponivel": somas["disponivel"].to_numpy() / somas["linhas"].to_numpy(),
+    })
+
+# =====================================================
+# SHEET_CARREG
+# =====================================================
+
+def agregar_carregamentos(dados_carreg: pd.DataFrame) -> pd.DataFrame:
+    """Conta os dias distintos com carregamento por motorista."""
+    if dados_carreg.shape[1] == 0:
+        # aba vazia: df vazio com as colunas esperadas
+        return pd.DataFrame(columns=["driver_id", "driver_name", "dias_carregado"])
+    # colunas de data / driver detectadas uma vez por cabeçalho (esquemas.resolver_carregamentos);
+    # cabeçalho sem elas levanta ErroEsquema em vez de devolver carregamentos vazios
+    df_carreg, _ = aplicar_esquema(dados_carreg, "carregamentos", ABA_CARREG)
+
+    # cada texto de data distinto é convertido uma vez (formato aprendido do primeiro valor)
+    df_carreg["delivery_date"] = converter_datas(df_carreg["delivery_date"]).to_numpy()
+    df_carreg = df_carreg.dropna(subset=["delivery_date"])
+    df_carreg["dia_carregado"] = df_carreg["delivery_date"].dt.normalize()
+    return (
+        df_carreg.groupby(["driver_id", "driver_name"])["dia_carregado"]
+        .nunique()
+        .reset_index()
+        .rename(columns={"dia_carregado": "dias_carregado"})
+    )
+
+# =====================================================
+# SHEET_CADASTRO e SHEET_ATUALIZAR
+# =====================================================
+
+def preparar_cadastros(dados_cadastro: pd.DataFrame, dados_atual: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Padroniza telefone/driver_id/driver_name nas bases de cadastro e atualização."""
+    # telefone -> phone_number e driver_id / driver_name resolvidos uma vez por cabeçalho
+    # (esquemas.resolver_cadastro), cada aba renomeada de uma vez
+    df_cadastro, _ = aplicar_esquema(dados_cadastro, "cadastro", ABA_CADASTRO)
+    df_atual, _ = aplicar_esquema(dados_atual, "cadastro", ABA_ATUALIZAR)
+
+    # garantir colunas na forma esperada
+    if "driver_id" not in df_cadastro.columns:
+        df_cadastro["driver_id"] = pd.NA
+    if "driver_name" not in df_cadastro.columns:
+        df_cadastro["driver_name"] = pd.NA
+    if "driver_id" not in df_atual.columns:
+        df_atual["driver_id"] = pd.NA
+    if "driver_name" not in df_atual.columns:
+        df_atual["driver_name"] = pd.NA
+
+    # limpar duplicados
+    df_cadastro = df_cadastro.drop_duplicates(subset=["driver_id", "driver_name"])
+    df_atual = df_atual.drop_duplicates(subset=["driver_id", "driver_name"])
+    return df_cadastro, df_atual
+
+# =====================================================
+# SEQUÊNCIAS (RUN-LENGTH) POR MOTORISTA
+# =====================================================
+
+def calcular_sequencias(df_long: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sequências de dias por driver_id, calculadas para todos os motoristas de uma vez:
+    ordena uma única vez, marca o início de cada trecho (troca de motorista ou de
+    disponibilidade), mede o tamanho dos trechos e tira o máximo por motorista.
+    Recebe uma linha por motorista-dia (df_long não é explodido por cluster);
+    linhas repetidas do mesmo dia contam como um dia, disponível se qualquer uma for.
+
+    Colunas: max_dias_sem_ofertar, max_dias_ofertando (maior sequência disponível),
+    seq_atual_sem_ofertar e seq_atual_ofertando (sequência em curso na última data).
+    """
+    colunas = ["driver_id", "max_dias_sem_ofertar", "max_dias_ofertando",
+               "seq_atual_sem_ofertar", "seq_atual_ofertando"]
+    # factorize evita ordenar driver_id com tipos misturados (int/str vindos da planilha)
+    cod_driver, drivers = pd.factorize(df_long["driver_id"])
+    valido = cod_driver >= 0
+    if not valido.any():
+        return pd.DataFrame(columns=colunas)
+
+    por_dia = (
+        pd.DataFrame({
+            "driver": cod_driver[valido],
+            "data": df_long["data"].to_numpy()[valido],
+            "disponivel": df_long["disponivel"].to_numpy()[valido],
+        })
+        .groupby(["driver", "data"], sort=True)["disponivel"]
+        .max()
+    )
+    driver = por_dia.index.get_level_values("driver").to_numpy()
+    disponivel = por_dia.to_numpy() > 0
+
+    # início de trecho: primeira linha, troca de motorista ou de disponibilidade
+    inicio = np.ones(len(driver), dtype=bool)
+    inicio[1:] = (driver[1:] != driver[:-1]) | (disponivel[1:] != disponivel[:-1])
+    pos_inicio = np.flatnonzero(inicio)
+    tamanho = np.diff(np.append(pos_inicio, len(driver)))
+    trechos = pd.DataFrame({
+        "driver": driver[pos_inicio],
+        "sem_ofertar": np.where(disponivel[pos_inicio], 0, tamanho),
+        "ofertando": np.where(disponivel[pos_inicio], tamanho, 0),
+    })
+
+    grupos = trechos.groupby("driver", sort=False)
+    maximos = grupos[["sem_ofertar", "ofertando"]].max()
+    atuais = grupos[["sem_ofertar", "ofertando"]].last()
+
+    return pd.DataFrame({
+        "driver_id": drivers[maximos.index.to_numpy()],
+        "max_dias_sem_ofertar": maximos["sem_ofertar"].to_numpy(),
+        "max_dias_ofertando": maximos["ofertando"].to_numpy(),
+        "seq_atual_sem_ofertar": atuais["sem_ofertar"].to_numpy(),
+        "seq_atual_ofertando": atuais["ofertando"].to_numpy(),
+    })
+
+# =====================================================
+# RESUMO POR MOTORISTA
+# =====================================================
+
+CHAVE_RESUMO = ["driver_id", "driver_name", "vehicle_type", "no_show_time"]
+
+def agregar_oferta(df_long: pd.DataFrame, sequencias: pd.DataFrame) -> pd.DataFrame:
+    """Totais de oferta por motorista (uma linha por CHAVE_RESUMO) e sequências de dias."""
+    # dias ofertados por dia (um dia é contado se qualquer turno ofertado naquele dia)
+    dias_ofertados = (
+        df_long[df_long["disponivel"] == 1]
+        .groupby(["driver_id", "driver_name", "data"])["disponivel"]
+        .max()
+        .reset_index()
+    )
+
+    agregados = df_long.groupby(CHAVE_RESUMO, dropna=False).agg(
+        total_dias=("data", "nunique")
+    ).reset_index()
+
+    dias_disponiveis = dias_ofertados.groupby(["driver_id", "driver_name"], dropna=False).agg(
+        dias_disponivel=("data", "nunique")
+    ).reset_index()
+
+    agregados = agregados.merge(dias_disponiveis, on=["driver_id", "driver_name"], how="left")
+    agregados["dias_disponivel"] = agregados["dias_disponivel"].fillna(0).astype(int)
+
+    # sequências de dias (calculadas por driver_id)
+    agregados = agregados.merge(sequencias, on="driver_id", how="left")
+    colunas_seq = [c for c in sequencias.columns if c != "driver_id"]
+    agregados[colunas_seq] = agregados[colunas_seq].fillna(0).astype(int)
+    return agregados
+
+def montar_resumo(
+    agregados_oferta: pd.DataFrame,
+    dias_carregados_df: pd.DataFrame,
+    df_cadastro: pd.DataFrame,
+    df_atual: pd.DataFrame,
+) -> pd.DataFrame:
+    """Consolida oferta, carregamento, categoria e dados de cadastro em uma linha por motorista."""
+    resumo = agregados_oferta.copy()
+    resumo["dias_sem_ofertar"] = resumo["total_dias"] - resumo["dias_disponivel"]
+
+    # adicionar dias_carregado
+    resumo = resumo.merge(dias_carregados_df, on=["driver_id", "driver_name"], how="left")
+    resumo["dias_carregado"] = resumo["dias_carregado"].fillna(0).astype(int)
+
+    # oferta x carregamento %
+    resumo["oferta_x_carregamento_%"] = ((resumo["dias_carregado"] / resumo["dias_disponivel"].replace(0, np.nan)) * 100).fillna(0).round(1)
+
+    # regra extra: se ofertou <= 1 dia por cada 7 dias no período, marcar Risco de Churn
+    # para comparação usamos total_dias (período disponível no relatório)
+    resumo["rate_por_7dias"] = calcular_rate_por_7dias(resumo)
+
+    # Classificação (tabela de regras em regras.py; o app reclassifica com os limites da sidebar)
+    resumo["categoria"] = classificar_motoristas(resumo)
+
+    # anexar telefone e status cadastro (união com df_cadastro / df_atual)
+    # criar df_cad_total para procurar phone/status
+    df_cad_total = pd.concat([df_cadastro.assign(status_cadastro="Existente"), df_atual.assign(status_cadastro="Atualização")], ignore_index=True, sort=False)
+    # normalizar coluna phone_number se existir
+    if "phone_number" not in df_cad_total.columns:
+        df_cad_total["phone_number"] = pd.NA
+
+    # garantir driver_id na df_cad_total
+    if "driver_id" not in df_cad_total.columns:
+        df_cad_total["driver_id"] = pd.NA
+    if "driver_name" not in df_cad_total.columns:
+        df_cad_total["driver_name"] = pd.NA
+
+    # dedup por driver_id preferencialmente
+    df_cad_total = df_cad_total.drop_duplicates(subset=["driver_id", "driver_name"])
+
+    resumo = resumo.merge(df_cad_total[["driver_id", "phone_number", "status_cadastro"]], on="driver_id", how="left")
+
+    # preencher nulos
+    resumo["phone_number"] = resumo["phone_number"].fillna("N/A")
+    resumo["status_cadastro"] = resumo["status_cadastro"].fillna("N/A")
+    return resumo
+
+# =====================================================
+# LAYOUT COMPACTO EM MEMÓRIA
+# =====================================================
+
+# colunas de texto do df_long repetidas em todas as datas: viram categóricas (dicionário)
+COLUNAS_CATEGORICAS_LONG = ["driver_id", "driver_name", "cluster", "vehicle_type", "no_show_time"]
+# no resumo (uma linha por motorista) só compensa para texto com poucos valores distintos
+COLUNAS_CATEGORICAS_RESUMO = ["vehicle_type", "no_show_time", "status_cadastro"]
+TIPO_DATA = pd.ArrowDtype(pa.date32())
+
+def compactar_long(df_long: pd.DataFrame) -> pd.DataFrame:
+    """
+    df_long enxuto para servir ao app: texto repetido como categórico, `data` como
+    date32 (4 bytes), flags int8 e sem o texto bruto de `status` (já classificado
+    em `disponivel`/`turno`).
+    """
+    df = df_long.drop(columns=["status"], errors="ignore")
+    colunas = {}
+    for col in COLUNAS_CATEGORICAS_LONG:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            colunas[col] = df[col].astype("category")
+    if "data" in df.columns and df["data"].dtype != TIPO_DATA:
+        colunas["data"] = df["data"].astype(TIPO_DATA)
+    if "disponivel" in df.columns:
+        colunas["disponivel"] = df["disponivel"].astype(np.int8)
+    return df.assign(**colunas).reset_index(drop=True)
+
+def compactar_resumo(resumo: pd.DataFrame) -> pd.DataFrame:
+    """Contagens em int32 e texto de baixa cardinalidade como categórico."""
+    resumo = resumo.copy()
+    # int32 e não o menor tipo possível: somas e contas no app não podem estourar
+    limite = np.iinfo(np.int32)
+    for col in resumo.select_dtypes(include="integer").columns:
+        if len(resumo) == 0 or (resumo[col].min() >= limite.min and resumo[col].max() <= limite.max):
+            resumo[col] = resumo[col].astype(np.int32)
+    for col in COLUNAS_CATEGORICAS_RESUMO:
+        if col in resumo.columns:
+            resumo[col] = resumo[col].astype("category")
+    return resumo
+
+def relatorio_memoria(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Linhas, colunas e memória (MB, contando o conteúdo dos textos) de cada DataFrame."""
+    linhas = []
+    for nome, df in frames.items():
+        linhas.append({
+            "frame": nome,
+            "linhas": len(df),
+            "colunas": df.shape[1],
+            "memoria_mb": round(df.memory_usage(deep=True, index=True).sum() / 1024 ** 2, 2),
+        })
+    return pd.DataFrame(linhas)
+
+# =====================================================
+# CACHE DE ETAPAS
+# =====================================================
+
+def impressao_df(df: pd.DataFrame) -> str:
+    """Impressão digital do conteúdo de um DataFrame (colunas + valores)."""
+    h = hashlib.sha1(repr(list(df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def _chave_etapa(*impressoes: str) -> str:
+    return hashlib.sha1("|".join(impressoes).encode("utf-8")).hexdigest()
+
+class CacheEtapas:
+    """
+    Memoiza as etapas do pipeline pela impressão digital das entradas.
+    Guarda só a última saída de cada etapa: se uma aba muda, apenas as etapas
+    que dependem dela são recalculadas; as demais reaproveitam a saída anterior.
+    As saídas são compartilhadas: as etapas nunca alteram as entradas in-place.
+    """
+
+    def __init__(self):
+        self._saidas: Dict[str, Tuple[str, object]] = {}
+        self._lock = threading.Lock()
+        self.acertos: Counter = Counter()
+        self.falhas: Counter = Counter()
+
+    def obter(self, etapa: str, chave: str, calcular):
+        with self._lock:
+            atual = self._saidas.get(etapa)
+        if atual is not None and atual[0] == chave:
+            self.acertos[etapa] += 1
+            return atual[1]
+        self.falhas[etapa] += 1
+        valor = calcular()
+        with self._lock:
+            self._saidas[etapa] = (chave, valor)
+        return valor
+
+class _SemCache:
+    def obter(self, etapa: str, chave: str, calcular):
+        return calcular()
+
+def ingerir_grades(grades: Dict[str, List[List]], cache: Optional[CacheEtapas] = None):
+    """
+    Etapa de ingestão por aba: grade bruta -> registros, memoizada pela impressão da grade.
+    Retorna (abas, impressões) para repassar a `processar`.
+    """
+    abas, impressoes = {}, {}
+    for aba, grade in grades.items():
+        abas[aba], impressoes[aba] = ingerir_grade(aba, grade, cache)
+    return abas, impressoes
+
+def ingerir_grade(aba: str, grade: List[List], cache: Optional[CacheEtapas] = None) -> Tuple[pd.DataFrame, str]:
+    """Ingestão de uma aba: (registros, impressão da grade). Pode rodar em paralelo com as demais."""
+    cache = cache or _SemCache()
+    impressao = impressao_grade(grade)
+    return cache.obter(f"ingestao:{aba}", impressao, lambda: grade_para_registros(grade)), impressao
+
+# =====================================================
+# PIPELINE COMPLETO
+# =====================================================
+
+def _sem_medicao(etapa: str):
+    return nullcontext()
+
+def processar(
+    abas: Dict[str, pd.DataFrame],
+    medir=_sem_medicao,
+    oferta=None,
+    cache: Optional[CacheEtapas] = None,
+    impressoes: Optional[Dict[str, str]] = None,
+):
+    """
+    Executa todas as etapas a partir das abas brutas (nome da aba -> DataFrame).
+    `medir(etapa)` deve devolver um context manager; é usado pelo benchmark e pela
+    instrumentação do app (diagnostico.py) para cronometrar cada etapa.
+    `oferta=(df_long, agregados_oferta)` reaproveita a SHEET_OFERTA já tratada
+    (atualização incremental); nesse caso `abas` dispensa ABA_OFERTA.
+    Com `cache`, cada etapa é memoizada pela impressão das abas de que depende
+    (`impressoes`, calculadas aqui quando não informadas).
+    """
+    impressoes = dict(impressoes or {})
+    if cache is None:
+        cache = _SemCache()
+    else:
+        for aba, df in abas.items():
+            if aba not in impressoes:
+                impressoes[aba] = impressao_df(df)
+        if oferta is not None and ABA_OFERTA not in impressoes:
+            impressoes[ABA_OFERTA] = _chave_etapa(impressao_df(oferta[0]), impressao_df(oferta[1]))
+
+    def etapa(nome: str, dependencias: List[str], calcular, guardar: bool = True):
+        def executar():
+            with medir(nome) as registro:
+                valor = calcular()
+                anotar_linhas(registro, valor)
+            return valor
+        if not guardar:
+            return executar()
+        return cache.obter(nome, _chave_etapa(*(impressoes.get(a, "") for a in dependencias)), executar)
+
+    # ---------- SHEET_OFERTA (etapas encadeadas e preguiçosas: só roda o que faltar no cache) ----------
+    if oferta is None:
+        classificada = {}
+
+        def oferta_classificada():
+            # calculada no máximo uma vez por chamada, mesmo sem cache de etapas
+            if "df" not in classificada:
+                classificada["df"] = etapa("classificar", [ABA_OFERTA], lambda: classificar_disponibilidade(
+                    etapa("reshape_oferta", [ABA_OFERTA], lambda: preparar_oferta(abas[ABA_OFERTA]), guardar=False)
+                ), guardar=False)
+            return classificada["df"]
+
+        agregados_oferta = etapa("agregar_oferta", [ABA_OFERTA], lambda: agregar_oferta(
+            oferta_classificada(),
+            etapa("sequencias", [ABA_OFERTA], lambda: calcular_sequencias(oferta_classificada()), guardar=False),
+        ))
+    else:
+        df_long_oferta, agregados_oferta = oferta
+
+        def oferta_classificada():
+            return df_long_oferta
+
+    # só a versão compacta do df_long fica no cache (a classificada é intermediária)
+    df_long = etapa("compactar_long", [ABA_OFERTA], lambda: compactar_long(oferta_classificada()))
+    df_clusters = etapa("clusters", [ABA_OFERTA], lambda: montar_clusters(df_long))
+    cubo = etapa("cubo", [ABA_OFERTA], lambda: montar_cubo(df_long, df_clusters))
+
+    # ---------- demais abas ----------
+    dias_carregados_df = etapa("agregar_carreg", [ABA_CARREG], lambda: agregar_carregamentos(abas[ABA_CARREG]))
+    df_cadastro, df_atual = etapa(
+        "cadastros", [ABA_CADASTRO, ABA_ATUALIZAR],
+        lambda: preparar_cadastros(abas[ABA_CADASTRO], abas[ABA_ATUALIZAR]),
+    )
+
+    # ---------- RESUMO ----------
+    resumo = etapa(
+        "resumo", [ABA_OFERTA, ABA_CARREG, ABA_CADASTRO, ABA_ATUALIZAR],
+        lambda: compactar_resumo(montar_resumo(agregados_oferta, dias_carregados_df, df_cadastro, df_atual)),
+    )
+
+    # preparar conjuntos para filtros (clusters originais únicos)
+    clusters_unicos = sorted(df_clusters["cluster"].dropna().unique().tolist())
+
+    return resumo, df_long, df_cadastro, df_atual, df_clusters, cubo, clusters_unicos
@@ -0,0 +1,101 @@
+# regras.py
+# Regras de categorização dos motoristas em forma de tabela:
+# condições avaliadas em ordem sobre o `resumo` inteiro (a primeira que casar vence).
+#
+# As condições são expressões do DataFrame.eval; parâmetros entram como `@nome`.
+# Um arquivo JSON pode substituir a tabela e/ou os parâmetros:
+#   {
+#     "parametros": {"dias_risco": 21},
+#     "regras": [{"categoria": "Inativo", "condicao": "dias_disponivel == 0"}, ...],
+#     "padrao": "Intermediário"
+#   }
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ENV_REGRAS = "DRIVERS_REGRAS"
+ARQUIVO_REGRAS = "regras_categoria.json"
+
+ORDEM_CATEGORIAS = ["Engajado", "Intermediário", "Risco de Churn", "Inativo"]
+
+PARAMETROS_PADRAO: Dict[str, float] = {
+    "dias_risco": 14,         # risco se dias_sem_ofertar > dias_risco
+    "rate_minimo": 1,         # risco se ofertou <= rate_minimo dia(s) a cada 7
+    "fracao_engajado": 0.5,   # engajado se ofertou em mais que essa fração dos dias
+}
+
+REGRAS_PADRAO: List[Dict[str, str]] = [
+    {"categoria": "Inativo", "condicao": "dias_disponivel == 0"},
+    {"categoria": "Risco de Churn", "condicao": "dias_sem_ofertar > @dias_risco or rate_por_7dias <= @rate_minimo"},
+    {"categoria": "Engajado", "condicao": "dias_disponivel > total_dias * @fracao_engajado"},
+]
+
+CATEGORIA_PADRAO = "Intermediário"
+
+
+def carregar_regras(caminho: Optional[str] = None) -> Dict:
+    """
+    Lê a tabela de regras do JSON indicado (ou DRIVERS_REGRAS / regras_categoria.json).
+    Sem arquivo, devolve as regras padrão.
+    """
+    config = {
+        "parametros": dict(PARAMETROS_PADRAO),
+        "regras": list(REGRAS_PADRAO),
+        "padrao": CATEGORIA_PADRAO,
+    }
+    caminho = caminho or os.environ.get(ENV_REGRAS) or ARQUIVO_REGRAS
+    if not os.path.exists(caminho):
+        return config
+    with open(caminho, encoding="utf-8") as f:
+        dados = json.load(f)
+    config["parametros"].update(dados.get("parametros", {}))
+    config["regras"] = dados.get("regras", config["regras"])
+    config["padrao"] = dados.get("padrao", config["padrao"])
+    return config
+
+
+def calcular_rate_por_7dias(resumo: pd.DataFrame) -> pd.Series:
+    """Dias ofertados por janela de 7 dias no período (total_dias)."""
+    total = resumo["total_dias"].to_numpy(dtype=float)
+    disp = resumo["dias_disponivel"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(total > 0, disp / total * 7, 0.0)
+    return pd.Series(rate, index=resumo.index)
+
+
+def classificar_motoristas(
+    resumo: pd.DataFrame,
+    regras: Optional[List[Dict[str, str]]] = None,
+    parametros: Optional[Dict[str, float]] = None,
+    padrao: str = CATEGORIA_PADRAO,
+) -> pd.Series:
+    """Avalia as regras em ordem numa única passada vetorizada e devolve a categoria de cada linha."""
+    regras = REGRAS_PADRAO if regras is None else regras
+    parametros = {**PARAMETROS_PADRAO, **(parametros or {})}
+
+    condicoes = []
+    for regra in regras:
+        try:
+            cond = resumo.eval(regra["condicao"], local_dict=parametros)
+        except Exception as e:
+            raise ValueError(f"Regra inválida para '{regra.get('categoria')}': {regra.get('condicao')!r} ({e})") from e
+        condicoes.append(np.asarray(cond, dtype=bool))
+
+    if condicoes:
+        categorias = np.select(condicoes, [r["categoria"] for r in regras], default=padrao)
+    else:
+        categorias = np.full(len(resumo), padrao)
+    return pd.Series(categorias.astype(object), index=resumo.index)
+
+
+def aplicar_categorias(resumo: pd.DataFrame, config: Optional[Dict] = None) -> pd.DataFrame:
+    """Recalcula `categoria` do resumo com a configuração dada (sem recarregar os dados)."""
+    config = config or carregar_regras()
+    resumo = resumo.copy()
+    resumo["categoria"] = classificar_motoristas(
+        resumo, config["regras"], config["parametros"], config["padrao"]
+    )
+    return resumo
@@ -0,0 +1,292 @@
+# snapshot.py
+# Cache persistente em disco (Arrow/Feather) das abas brutas e do resultado do pipeline,
+# chaveado pela revisão da planilha. Sobrevive a restart/deploy: enquanto a planilha
+# não muda, nada é baixado de novo e o resultado é lido do disco com memory-map.
+#
+# Layout:
+#   <pasta>/abas/<fonte+revisão>/<ABA>.feather                 grade bruta (texto)
+#   <pasta>/resultado/<fonte+revisão+código>/<frame>.feather   resumo, df_long, ...
+#   .../meta.json                                             revisão, data, colunas mistas
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from config import ABAS, PARALELISMO_ABAS, PASTA_CACHE
+from fontes import FonteDados, converter_celula
+from diagnostico import anotar_linhas
+from pipeline import CacheEtapas, _sem_medicao, ingerir_grade, processar
+
+FRAMES_RESULTADO = ["resumo", "df_long", "df_cadastro", "df_atual", "df_clusters", "cubo"]
+
+# arquivos cujo conteúdo define o resultado; mudou o código, o resultado é recalculado
+_ARQUIVOS_CODIGO = ["config.py", "esquemas.py", "fontes.py", "incremental.py", "pipeline.py", "regras.py", "snapshot.py"]
+
+
+@lru_cache(maxsize=1)
+def versao_codigo() -> str:
+    h = hashlib.sha1()
+    base = Path(__file__).resolve().parent
+    for nome in _ARQUIVOS_CODIGO:
+        p = base / nome
+        if p.exists():
+            h.update(p.read_bytes())
+    return h.hexdigest()[:12]
+
+
+def chave(*partes: str) -> str:
+    return hashlib.sha1("|".join(partes).encode("utf-8")).hexdigest()[:16]
+
+
+# -----------------------------------------------------
+# Conversão DataFrame <-> Arrow
+# -----------------------------------------------------
+
+def para_arrow(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Arrow não aceita colunas object com tipos misturados (ex.: driver_id int e "" vindos
+    da planilha). Essas colunas são gravadas como texto e reconvertidas na leitura.
+    """
+    df = df.reset_index(drop=True)
+    mistas = []
+    for col in df.columns:
+        categorica = isinstance(df[col].dtype, pd.CategoricalDtype)
+        if df[col].dtype == object or categorica:
+            valores = df[col].cat.categories if categorica else df[col]
+            tipo = pd.api.types.infer_dtype(valores, skipna=True)
+            if tipo not in ("string", "empty", "integer", "floating", "boolean"):
+                mistas.append(col)
+                # em categóricas basta converter o dicionário (as categorias)
+                df[col] = df[col].map(lambda v: None if pd.isna(v) else str(v))
+                if not categorica:
+                    df[col] = df[col].astype(object)
+    return df, mistas
+
+
+def de_arrow(df: pd.DataFrame, mistas: List[str]) -> pd.DataFrame:
+    for col in mistas:
+        df[col] = df[col].map(lambda v: v if pd.isna(v) else converter_celula(v))
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
+
+
+def _gravar_atomico(destino: Path, escrever) -> None:
+    """Escreve numa pasta temporária e renomeia: sessões concorrentes nunca veem snapshot pela metade."""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=destino.parent, prefix=".tmp_"))
+    try:
+        escrever(tmp)
+        if destino.exists():
+            shutil.rmtree(destino, ignore_errors=True)
+        os.replace(tmp, destino)
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+# datas date32 voltam como date32 (e não como objetos datetime.date)
+_TIPOS_ARROW = {pa.date32(): pd.ArrowDtype(pa.date32())}
+
+
+def ler_feather(caminho: Path) -> pd.DataFrame:
+    return feather.read_table(caminho, memory_map=True).to_pandas(types_mapper=_TIPOS_ARROW.get)
+
+
+# -----------------------------------------------------
+# Cache
+# -----------------------------------------------------
+
+class CacheSnapshot:
+    """Snapshots em disco por (fonte, revisão); mantém só os `manter` mais recentes de cada tipo."""
+
+    def __init__(self, pasta=PASTA_CACHE, manter: int = 3):
+        self.pasta = Path(pasta)
+        self.manter = manter
+
+    def _dir_abas(self, fonte_id: str, revisao: str) -> Path:
+        return self.pasta / "abas" / chave(fonte_id, revisao)
+
+    def _dir_resultado(self, fonte_id: str, revisao: str) -> Path:
+        return self.pasta / "resultado" / chave(fonte_id, revisao, versao_codigo())
+
+    # ---------- abas brutas ----------
+    def ler_grades(self, fonte_id: str, revisao: str, abas: List[str]) -> Optional[Dict[str, List[List[str]]]]:
+        pasta = self._dir_abas(fonte_id, revisao)
+        if not all((pasta / f"{aba}.feather").exists() for aba in abas):
+            return None
+        return {aba: ler_feather(pasta / f"{aba}.feather").values.tolist() for aba in abas}
+
+    def salvar_grades(self, fonte_id: str, revisao: str, grades: Dict[str, List[List[str]]]) -> None:
+        # uma aba por arquivo, cada um gravado de forma atômica: leituras de abas
+        # diferentes na mesma revisão (pipeline, módulo de contato) se somam na pasta
+        pasta = self._dir_abas(fonte_id, revisao)
+        pasta.mkdir(parents=True, exist_ok=True)
+        for aba, grade in grades.items():
+            largura = max((len(l) for l in grade), default=0)
+            linhas = [list(map(str, l)) + [""] * (largura - len(l)) for l in grade]
+            df = pd.DataFrame(linhas, columns=[f"c{i}" for i in range(largura)], dtype=object)
+            fd, tmp = tempfile.mkstemp(dir=pasta, prefix=".tmp_", suffix=".feather")
+            os.close(fd)
+            try:
+                feather.write_feather(df, tmp, compression="uncompressed")
+                os.replace(tmp, pasta / f"{aba}.feather")
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        self._limpar(self.pasta / "abas")
+
+    # ---------- resultado do pipeline ----------
+    def ler_resultado(self, fonte_id: str, revisao: str):
+        pasta = self._dir_resultado(fonte_id, revisao)
+        if not (pasta / "meta.json").exists():
+            return None
+        meta = json.loads((pasta / "meta.json").read_text(encoding="utf-8"))
+        frames = [
+            de_arrow(ler_feather(pasta / f"{nome}.feather"), meta["mistas"][nome])
+            for nome in FRAMES_RESULTADO
+        ]
+        return (*frames, meta["clusters_unicos"])
+
+    def salvar_resultado(self, fonte_id: str, revisao: str, resultado) -> None:
+        *frames, clusters_unicos = resultado
+
+        def escrever(tmp: Path):
+            meta = {"revisao": revisao, "criado_em": time.time(), "clusters_unicos": clusters_unicos, "mistas": {}}
+            for nome, df in zip(FRAMES_RESULTADO, frames):
+                df, mistas = para_arrow(df)
+                meta["mistas"][nome] = mistas
+                feather.write_feather(df, tmp / f"{nome}.feather", compression="uncompressed")
+            (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        _gravar_atomico(self._dir_resultado(fonte_id, revisao), escrever)
+        self._limpar(self.pasta / "resultado")
+
+    def _limpar(self, pasta: Path) -> None:
+        snapshots = sorted(
+            (p for p in pasta.iterdir() if p.is_dir() and not p.name.startswith(".")),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for antigo in snapshots[self.manter:]:
+            shutil.rmtree(antigo, ignore_errors=True)
+
+
+def revisao_fonte(fonte: FonteDados) -> Optional[str]:
+    """Revisão atual da fonte; None (sem cache) se não for possível consultar."""
+    try:
+        return fonte.revisao()
+    except Exception:
+        return None
+
+
+def baixar_e_ingerir(
+    fonte: FonteDados,
+    abas: List[str],
+    cache_etapas: Optional[CacheEtapas] = None,
+    grades: Optional[Dict[str, List[List[str]]]] = None,
+    pool: Optional[ThreadPoolExecutor] = None,
+    medir=_sem_medicao,
+):
+    """
+    Grades brutas e registros das `abas`; retorna (grades, registros, impressões).
+    Todas as abas vêm numa só leitura em lote (fonte.ler_grades: um values:batchGet);
+    com `pool`, a ingestão de cada aba roda ao mesmo tempo. `grades` (já em disco)
+    dispensam o download.
+    """
+    if grades is None:
+        with medir("baixar:lote") as registro:
+            grades = fonte.ler_grades(abas)
+            anotar_linhas(registro, tuple(grades.values()))
+
+    def ingerir(aba: str):
+        with medir(f"ingerir:{aba}") as registro:
+            df, impressao = ingerir_grade(aba, grades[aba], cache_etapas)
+            anotar_linhas(registro, df)
+        return df, impressao
+
+    if pool is None:
+        resultados = {aba: ingerir(aba) for aba in abas}
+    else:
+        futuros = {aba: pool.submit(ingerir, aba) for aba in abas}
+        resultados = {aba: futuro.result() for aba, futuro in futuros.items()}
+    return (
+        {aba: grades[aba] for aba in abas},
+        {aba: r[0] for aba, r in resultados.items()},
+        {aba: r[1] for aba, r in resultados.items()},
+    )
+
+
+def carregar_com_snapshot(
+    fonte: FonteDados,
+    cache: CacheSnapshot,
+    abas: List[str] = ABAS,
+    incremental=None,
+    cache_etapas: Optional[CacheEtapas] = None,
+    paralelismo: int = PARALELISMO_ABAS,
+    medir=_sem_medicao,
+):
+    """
+    Devolve o resultado de `processar` usando o disco sempre que a revisão da
+    planilha não mudou: resultado pronto > abas brutas já baixadas > download.
+    Com `incremental` (um incremental.OfertaIncremental), a SHEET_OFERTA é
+    atualizada só pelas colunas de data novas em vez de baixada inteira; quando
+    ele pede releitura completa, o resultado salvo para a revisão não é usado.
+    Com `cache_etapas`, só as etapas que dependem de abas alteradas são recalculadas.
+    Com `paralelismo` > 1, a atualização incremental roda junto com a leitura em lote
+    das demais abas, e a ingestão das abas, num pool de threads desse tamanho.
+    `medir(etapa)` cronometra cada passo, como em `processar`.
+    """
+    def atualizar_oferta():
+        with medir("oferta_incremental") as registro:
+            oferta = incremental.atualizar()
+            anotar_linhas(registro, oferta[0])
+        return oferta
+
+    with (ThreadPoolExecutor(max_workers=paralelismo) if paralelismo > 1 else nullcontext()) as pool:
+        with medir("revisao"):
+            revisao = revisao_fonte(fonte)
+        if revisao is None:
+            _, registros, impressoes = baixar_e_ingerir(fonte, abas, cache_etapas, pool=pool, medir=medir)
+            return processar(registros, medir, cache=cache_etapas, impressoes=impressoes)
+
+        fonte_id = fonte.identificador
+        with medir("ler_resultado") as registro:
+            resultado = cache.ler_resultado(fonte_id, revisao)
+            anotar_linhas(registro, resultado[0] if resultado is not None else None)
+        if resultado is not None and not (incremental is not None and incremental.reconstrucao_pendente()):
+            return resultado
+
+        oferta = None
+        baixar = abas
+        atualizacao = None
+        if incremental is not None and incremental.aba in abas:
+            baixar = [aba for aba in abas if aba != incremental.aba]
+            # a oferta incremental roda junto com o download das demais abas
+            atualizacao = pool.submit(atualizar_oferta) if pool is not None else None
+
+        with medir("ler_grades_disco"):
+            grades_disco = cache.ler_grades(fonte_id, revisao, baixar)
+        grades, registros, impressoes = baixar_e_ingerir(fonte, baixar, cache_etapas, grades_disco, pool, medir)
+        if grades_disco is None:
+            with medir("salvar_grades"):
+                cache.salvar_grades(fonte_id, revisao, grades)
+
+        if baixar is not abas:
+            oferta = atualizacao.result() if atualizacao is not None else atualizar_oferta()
+            impressoes[incremental.aba] = incremental.impressao
+
+    resultado = processar(registros, medir, oferta=oferta, cache=cache_etapas, impressoes=impressoes)
+    with medir("salvar_resultado"):
+        cache.salvar_resultado(fonte_id, revisao, resultado)
+    return resultado
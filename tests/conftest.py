@@ -0,0 +1,7 @@
+# tests/conftest.py
+import os
+import tempfile
+
+# registro de esquemas e caches dos testes numa pasta temporária, fora da .cache_drivers
+# do projeto (config.PASTA_CACHE é lido na importação, antes dos módulos testados)
+os.environ["DRIVERS_CACHE"] = tempfile.mkdtemp(prefix="drivers_testes_")
@@ -0,0 +1,59 @@
+# tests/test_atualizador.py
+import time
+
+from atualizador import AtualizadorDados
+
+
+class Fonte:
+    """Revisão controlada pelo teste; conta cargas e conferências."""
+
+    def __init__(self, revisao="r1"):
+        self.atual = revisao
+        self.cargas = 0
+        self.conferencias = 0
+
+    def revisao(self):
+        self.conferencias += 1
+        return self.atual
+
+    def carregar(self):
+        self.cargas += 1
+        return {"carga": self.cargas}
+
+
+def _recarregar(atualizador, fonte):
+    """Pede uma recarga e espera a thread conferir a revisão e terminar."""
+    antes = fonte.conferencias
+    atualizador.solicitar()
+    limite = time.monotonic() + 5
+    while time.monotonic() < limite:
+        if fonte.conferencias > antes and not atualizador.atualizando:
+            return
+        time.sleep(0.005)
+    raise AssertionError("a recarga não terminou")
+
+
+def test_revisao_igual_mantem_dados_e_horario():
+    fonte = Fonte()
+    atualizador = AtualizadorDados(fonte.carregar, intervalo=3600, revisao=fonte.revisao)
+    dados, carregado_em = atualizador.obter()
+    _recarregar(atualizador, fonte)
+    assert atualizador.obter() == (dados, carregado_em)
+    assert fonte.cargas == 1
+    assert atualizador.verificado_em >= carregado_em
+
+    fonte.atual = "r2"
+    _recarregar(atualizador, fonte)
+    novos, recarregado_em = atualizador.obter()
+    assert novos == {"carga": 2} and recarregado_em > carregado_em
+    assert atualizador.revisao_carregada == "r2"
+    atualizador.parar()
+
+
+def test_sem_revisao_sempre_recarrega():
+    fonte = Fonte(revisao=None)
+    atualizador = AtualizadorDados(fonte.carregar, intervalo=3600, revisao=fonte.revisao)
+    atualizador.obter()
+    _recarregar(atualizador, fonte)
+    assert atualizador.obter()[0] == {"carga": 2}
+    atualizador.parar()
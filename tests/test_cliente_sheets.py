@@ -0,0 +1,99 @@
+# tests/test_cliente_sheets.py
+# ClienteComCota + FonteGoogleSheets + FilaContatos sobre a planilha falsa (cliente_falso.py).
+import threading
+
+import pytest
+
+from cliente_falso import ABA, GRADE, ErroHTTP, metrica, montar
+from contato import FilaContatos
+
+
+def test_repete_leitura_com_erro_temporario():
+    planilha, fonte, relogio = montar()
+    planilha.falhar("values_batch_get", ErroHTTP(503), vezes=2)
+    assert fonte.ler_grades([ABA])[ABA] == GRADE
+    assert planilha.chamadas["values_batch_get"] == 3
+    assert metrica(fonte, "values_batch_get", "repeticoes") == 2
+    # espera exponencial com jitter completo: até 1s e depois até 2s
+    assert len(relogio.esperas) == 2 and relogio.esperas[0] <= 1 and relogio.esperas[1] <= 2
+
+
+def test_desiste_depois_de_max_tentativas():
+    planilha, fonte, _ = montar(max_tentativas=3)
+    planilha.falhar("values_batch_get", ErroHTTP(429), vezes=10)
+    with pytest.raises(ErroHTTP):
+        fonte.ler_grades([ABA])
+    assert planilha.chamadas["values_batch_get"] == 3
+
+
+def test_erro_definitivo_nao_e_repetido():
+    planilha, fonte, relogio = montar()
+    planilha.falhar("values_batch_get", ErroHTTP(400))
+    with pytest.raises(ErroHTTP):
+        fonte.ler_grades([ABA])
+    assert planilha.chamadas["values_batch_get"] == 1 and not relogio.esperas
+
+
+def test_escrita_ambigua_nao_e_repetida():
+    planilha, fonte, _ = montar()
+    planilha.falhar("values_append", TimeoutError("resposta perdida"), depois_de_aplicar=True)
+    # o timeout chega a quem escreveu, sem segunda tentativa
+    with pytest.raises(TimeoutError):
+        fonte.anexar_linhas(ABA, [["2", "Bia", "", ""]])
+    assert planilha.chamadas["values_append"] == 1
+    assert [l[1] for l in planilha.abas[ABA][1:]] == ["Ana", "Bia"]
+
+
+def test_escrita_com_429_e_repetida():
+    planilha, fonte, _ = montar()
+    planilha.falhar("values_append", ErroHTTP(429))
+    fonte.anexar_linhas(ABA, [["2", "Bia", "", ""]])
+    assert planilha.chamadas["values_append"] == 2
+    assert [l[1] for l in planilha.abas[ABA][1:]] == ["Ana", "Bia"]
+
+
+def test_fila_nao_duplica_linha_apos_append_sem_resposta():
+    """Append aplicado mas sem resposta: a fila relê a aba e só marca o contato na linha que já entrou."""
+    planilha, fonte, _ = montar()
+    planilha.falhar("values_append", TimeoutError("resposta perdida"), depois_de_aplicar=True)
+    fila = FilaContatos(fonte, ABA, espera_inicial=0.01, espera_maxima=0.05)
+    fila.enfileirar("Bia", "Contato Efetivado", {"driver_id": "2", "driver_name": "Bia", "phone_number": "118"})
+    assert fila.aguardar(5), "a fila não esvaziou"
+    fila.parar()
+    linhas_bia = [l for l in planilha.abas[ABA][1:] if l[1] == "Bia"]
+    assert len(linhas_bia) == 1 and linhas_bia[0][3] == "Contato Efetivado", planilha.abas[ABA]
+    assert planilha.chamadas["values_append"] == 1 and not fila.falhas
+
+
+def test_leituras_identicas_simultaneas_viram_uma_chamada():
+    planilha, fonte, _ = montar()
+    planilha.segurar_leituras = True
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(fonte.ler_grades([ABA])[ABA])) for _ in range(2)]
+    threads[0].start()
+    assert planilha.leitura_iniciada.wait(5)
+    threads[1].start()
+    # a segunda leitura idêntica espera a primeira em vez de ir à planilha
+    for _ in range(500):
+        if metrica(fonte, "values_batch_get", "deduplicadas") == 1:
+            break
+        threading.Event().wait(0.01)
+    planilha.liberar()
+    for t in threads:
+        t.join(5)
+    assert resultados == [GRADE, GRADE]
+    assert planilha.chamadas["values_batch_get"] == 1
+    assert metrica(fonte, "values_batch_get", "deduplicadas") == 1
+
+
+def test_espera_cota_por_tipo_de_chamada():
+    # 6 leituras/min: balde de 1 token, reposto a cada 10s
+    planilha, fonte, relogio = montar(leituras_por_minuto=6)
+    fonte.planilha  # abrir a planilha (open_by_key) também gasta um token de leitura
+    assert relogio.esperas == []
+    fonte.ler_grades([ABA])
+    assert relogio.esperas == [pytest.approx(10)]
+    assert metrica(fonte, "values_batch_get", "espera_cota_s") == pytest.approx(10)
+    # escritas têm balde próprio: não esperam pelas leituras
+    fonte.atualizar_celulas(ABA, [(2, 4, "ok")])
+    assert len(relogio.esperas) == 1
@@ -0,0 +1,40 @@
+# tests/test_contato.py
+from contato import planejar_registros
+
+GRADE = [
+    ["Driver ID", "Driver Name", "Telefone", "contato"],
+    ["1", "Ana", "119", ""],
+    ["2", "Bia", "118", "Sem Resposta"],
+    ["3", "Ana", "117", ""],
+]
+
+
+def test_marca_todas_as_linhas_do_motorista():
+    plano = planejar_registros(GRADE, [{"driver_name": " Ana ", "status": "Contato Efetivado"}])
+    assert plano == {"celulas": [(2, 4, "Contato Efetivado"), (4, 4, "Contato Efetivado")], "linhas_novas": []}
+
+
+def test_motorista_novo_vira_linha_na_ordem_das_colunas():
+    novo = {"driver_id": "9", "driver_name": "Caio", "phone_number": "116"}
+    plano = planejar_registros(GRADE, [
+        {"driver_name": "Bia", "status": "Contato Efetivado"},
+        {"driver_name": "Caio", "status": "Sem Resposta", "novo": novo},
+    ])
+    assert plano["celulas"] == [(3, 4, "Contato Efetivado")]
+    # telefone da grade ("Telefone") resolvido pelo mesmo esquema da carga
+    assert plano["linhas_novas"] == [["9", "Caio", "116", "Sem Resposta"]]
+
+
+def test_cria_coluna_contato_quando_falta():
+    grade = [["Driver ID", "Driver Name"], ["1", "Ana"]]
+    plano = planejar_registros(grade, [
+        {"driver_name": "Ana", "status": "Contato Efetivado"},
+        {"driver_name": "Duda", "status": "Sem Resposta"},
+    ])
+    assert plano["celulas"] == [(1, 3, "contato"), (2, 3, "Contato Efetivado")]
+    assert plano["linhas_novas"] == [["", "Duda", "Sem Resposta"]]
+
+
+def test_grade_vazia():
+    plano = planejar_registros([], [{"driver_name": "Ana", "status": "Contato Efetivado"}])
+    assert plano == {"celulas": [(1, 1, "contato")], "linhas_novas": [["Contato Efetivado"]]}
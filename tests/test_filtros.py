@@ -0,0 +1,61 @@
+# tests/test_filtros.py
+# IndiceFiltros comparado com os mesmos filtros aplicados por máscara nas colunas.
+import numpy as np
+import pandas as pd
+import pytest
+
+from filtros import IndiceFiltros
+
+
+@pytest.fixture
+def dados():
+    rng = np.random.default_rng(0)
+    n = 500
+    resumo = pd.DataFrame({
+        # um driver_id pode ter mais de uma linha no resumo
+        "driver_id": rng.integers(0, 400, n),
+        "vehicle_type": rng.choice(np.array(["Moto", "Carro", "Van", None], dtype=object), n),
+        # sem nulos: pipeline.montar_resumo preenche com 0
+        "oferta_x_carregamento_%": np.round(rng.uniform(0, 100, n), 1),
+        "categoria": rng.choice(["Engajado", "Risco de Churn", "Inativo"], n),
+    })
+    df_clusters = pd.DataFrame({
+        "driver_id": rng.integers(0, 450, 700),
+        "cluster": pd.Categorical(rng.choice(["A", "B", "C"], 700)),
+    }).drop_duplicates()
+    return resumo, df_clusters
+
+
+def _por_mascara(resumo, df_clusters, categorias, veiculos, cluster, min_aprov):
+    mascara = resumo["categoria"].isin(categorias) & resumo["vehicle_type"].isin(veiculos)
+    if cluster is not None:
+        mascara &= resumo["driver_id"].isin(df_clusters.loc[df_clusters["cluster"] == cluster, "driver_id"])
+    mascara &= resumo["oferta_x_carregamento_%"] >= min_aprov
+    return np.flatnonzero(mascara.to_numpy())
+
+
+@pytest.mark.parametrize("categorias, veiculos, cluster, min_aprov", [
+    (["Engajado", "Risco de Churn", "Inativo"], ["Moto", "Carro", "Van"], None, 0),
+    (["Engajado"], ["Moto", "Van"], None, 0),
+    (["Inativo", "Risco de Churn"], ["Carro"], "B", 0),
+    (["Engajado", "Inativo"], ["Moto", "Carro", "Van"], "A", 55),
+    (["Engajado"], ["Moto", "Carro", "Van"], "inexistente", 0),
+    ([], ["Moto"], None, 0),
+    (["Engajado", "Risco de Churn", "Inativo"], ["Moto", "Carro", "Van"], None, 100),
+])
+def test_filtrar_resumo_igual_a_mascara(dados, categorias, veiculos, cluster, min_aprov):
+    resumo, df_clusters = dados
+    indice = IndiceFiltros(resumo, df_clusters).com_categorias(resumo["categoria"])
+    obtido = indice.filtrar_resumo(categorias, veiculos, cluster, min_aprov)
+    esperado = _por_mascara(resumo, df_clusters, categorias, veiculos, cluster, min_aprov)
+    np.testing.assert_array_equal(obtido, esperado)
+
+
+def test_com_categorias_nao_altera_o_indice_compartilhado(dados):
+    resumo, df_clusters = dados
+    indice = IndiceFiltros(resumo, df_clusters)
+    indice.com_categorias(resumo["categoria"])
+    assert indice.por_categoria == {}
+    todas = pd.Series(["Engajado"] * len(resumo))
+    copia = indice.com_categorias(todas)
+    assert len(copia.filtrar_resumo(["Engajado"], ["Moto", "Carro", "Van"], None, 0)) == resumo["vehicle_type"].notna().sum()
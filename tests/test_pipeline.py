@@ -0,0 +1,79 @@
+# tests/test_pipeline.py
+# Regras vetorizadas do pipeline comparadas com versões célula a célula / motorista a motorista.
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import (
+    TURNOS, calcular_sequencias, classificar_status, verificar_disponibilidade_e_turno,
+)
+
+STATUS = [
+    "05:15-09:00", "11:45-14:30", "05:15-09:00, 11:45-14:30", "16:00-19:30", "texto livre",
+    "", " ", "--", " -- ", "Not Available", None, np.nan, 0, 1.5, "05:15-09:00 (confirmado)",
+]
+
+
+def test_classificar_status_igual_a_regra_por_celula():
+    serie = pd.Series(STATUS * 3, dtype=object)
+    disponivel, turno = classificar_status(serie)
+    esperado = [verificar_disponibilidade_e_turno(v) for v in serie]
+    assert disponivel.dtype == np.int8
+    assert list(disponivel) == [d for d, _ in esperado]
+    assert list(turno) == [t for _, t in esperado]
+    assert list(turno.categories) == TURNOS
+
+
+def _sequencias_referencia(df_long: pd.DataFrame) -> pd.DataFrame:
+    """Um motorista por vez: dias em ordem, um dia disponível se qualquer linha dele for."""
+    linhas = []
+    for driver, grupo in df_long.groupby("driver_id", sort=False):
+        dias = grupo.groupby("data")["disponivel"].max().sort_index().to_list()
+        trechos = []  # (disponível, tamanho)
+        for d in dias:
+            if trechos and trechos[-1][0] == d:
+                trechos[-1][1] += 1
+            else:
+                trechos.append([d, 1])
+        linhas.append({
+            "driver_id": driver,
+            "max_dias_sem_ofertar": max((n for d, n in trechos if not d), default=0),
+            "max_dias_ofertando": max((n for d, n in trechos if d), default=0),
+            "seq_atual_sem_ofertar": 0 if trechos[-1][0] else trechos[-1][1],
+            "seq_atual_ofertando": trechos[-1][1] if trechos[-1][0] else 0,
+        })
+    return pd.DataFrame(linhas)
+
+
+@pytest.mark.parametrize("semente", [0, 1, 2])
+def test_calcular_sequencias_igual_a_referencia(semente):
+    rng = np.random.default_rng(semente)
+    datas = pd.date_range("2025-01-01", periods=30)
+    n = 2000
+    df_long = pd.DataFrame({
+        # ids misturados (int e texto) e dias repetidos, fora de ordem
+        "driver_id": np.array([1, 2, 3, "4", "x5", 6, 7], dtype=object)[rng.integers(0, 7, n)],
+        "data": rng.choice(datas, n),
+        "disponivel": rng.integers(0, 2, n).astype(np.int8),
+    })
+    obtido = calcular_sequencias(df_long).set_index("driver_id").sort_index(key=lambda s: s.astype(str))
+    esperado = _sequencias_referencia(df_long).set_index("driver_id").sort_index(key=lambda s: s.astype(str))
+    pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False)
+
+
+def test_calcular_sequencias_caso_conhecido():
+    datas = pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-03", "2025-01-04", "2025-01-05"])
+    df_long = pd.DataFrame({
+        "driver_id": [10] * 5 + [20, 20],
+        "data": list(datas) + [datas[0], datas[0]],
+        "disponivel": [1, 0, 0, 1, 1] + [0, 1],
+    })
+    seq = calcular_sequencias(df_long).set_index("driver_id")
+    assert seq.loc[10].to_list() == [2, 2, 0, 2]
+    # mesmo dia repetido conta uma vez, disponível
+    assert seq.loc[20].to_list() == [0, 1, 0, 1]
+
+
+def test_calcular_sequencias_sem_linhas():
+    vazio = pd.DataFrame({"driver_id": [], "data": [], "disponivel": []})
+    assert calcular_sequencias(vazio).empty
@@ -0,0 +1,25 @@
+# tests/test_snapshot.py
+from cliente_falso import ClienteFalso, PlanilhaFalsa, RelogioFalso
+from cliente_sheets import ClienteComCota
+from config import ABAS
+from dados_sinteticos import gerar_abas
+from fontes import FonteGoogleSheets
+from snapshot import CacheSnapshot, carregar_com_snapshot
+
+
+def test_carga_le_todas_as_abas_numa_requisicao(tmp_path):
+    abas = gerar_abas(50, 10, 3, seed=0)
+    planilha = PlanilhaFalsa({
+        aba: [list(df.columns)] + df.astype(str).values.tolist() for aba, df in abas.items()
+    })
+    relogio = RelogioFalso()
+    cliente = ClienteComCota(ClienteFalso(planilha), dormir=relogio.dormir, relogio=relogio)
+    fonte = FonteGoogleSheets(cliente, "falsa")
+
+    resumo = carregar_com_snapshot(fonte, CacheSnapshot(tmp_path), ABAS, paralelismo=4)[0]
+    assert len(resumo) == 50
+    # com ingestão em paralelo, o download continua sendo um só values:batchGet
+    assert planilha.chamadas["values_batch_get"] == 1
+    # mesma revisão: resultado do disco, sem nova leitura
+    carregar_com_snapshot(fonte, CacheSnapshot(tmp_path), ABAS, paralelismo=4)
+    assert planilha.chamadas["values_batch_get"] == 1